@@ -1,19 +1,25 @@
 import streamlit as st
-import pandas as pd
-import time
+import hashlib
+import io
 from datetime import datetime
-import random
-import re
 from pathlib import Path
-import numpy as np
+from contextlib import nullcontext
 import os
 
+from engine import (
+    BREAKDOWN_DIMENSIONS, DEFAULT_SETTINGS, WORKING_FORMAT, METRICS_PATH, ActivityLogger, PipelineMetrics, SupervisorAgent,
+    RefreshScheduler, profiled,
+    generate_synthetic_leads, to_typed_leads, save_leads, read_leads, export_xlsx_bytes, run_workflow, stream_workflow
+)
+
 st.set_page_config(
     page_title=" Automated Sales CRM",
     layout="wide",
     initial_sidebar_state="expanded"
 )
 
+# Streamlit rebuilds the page from scratch on every rerun, so the styles
+# have to be emitted every time; it is a few hundred bytes.
 st.markdown("""
     <style>
     .agent-card {
@@ -48,222 +54,114 @@ if 'show_process_button' not in st.session_state:
     st.session_state.show_process_button = False
 if 'current_file' not in st.session_state:
     st.session_state.current_file = None
-
-class ActivityLogger:
-    def __init__(self):
-        self.logs = {
-            'supervisor': [],
-            'agent_a': [],
-            'agent_b': [],
-            'system': []
-        }
-    
-    def add_log(self, agent_type, message, status='info'):
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        self.logs[agent_type].append({
-            'timestamp': timestamp,
-            'message': message,
-            'status': status
-        })
-
-    def get_agent_logs(self, agent_type):
-        return self.logs[agent_type]
-
-    def get_all_logs(self):
-        all_logs = []
-        for agent_type in self.logs:
-            all_logs.extend([(agent_type, log) for log in self.logs[agent_type]])
-        return sorted(all_logs, key=lambda x: x[1]['timestamp'], reverse=True)
-
-    def clear_logs(self):
-        self.logs = {
-            'supervisor': [],
-            'agent_a': [],
-            'agent_b': [],
-            'system': []
-        }
+for setting, default in DEFAULT_SETTINGS.items():
+    if setting not in st.session_state:
+        st.session_state[setting] = default
+if 'streaming_mode' not in st.session_state:
+    st.session_state.streaming_mode = False
+if 'sample_size' not in st.session_state:
+    st.session_state.sample_size = 5
+if 'refresh_interval_ms' not in st.session_state:
+    st.session_state.refresh_interval_ms = 500
+if 'refresh_every' not in st.session_state:
+    st.session_state.refresh_every = 50
+if 'upload_digest' not in st.session_state:
+    st.session_state.upload_digest = None
+if 'pipeline_metrics' not in st.session_state:
+    st.session_state.pipeline_metrics = PipelineMetrics()
+if 'export_metrics' not in st.session_state:
+    st.session_state.export_metrics = False
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = 'off'
 
 
 def generate_sample_data():
     """Generate sample leads data with some invalid emails"""
-   
-    companies = [
-        ('Tech Solutions Inc', 'Technology'),
-        ('HealthCare Plus', 'Healthcare'),
-        ('Manufacturing Pro', 'Manufacturing'),
-        ('Finance Corp', 'Finance'),
-        ('Retail Giants', 'Retail'),
-        ('Education First', 'Education'),
-        ('Green Energy Co', 'Energy'),
-        ('Food Services Ltd', 'Food Service'),
-        ('Marketing Masters', 'Marketing'),
-        ('Construction Hub', 'Construction')
-    ]
-    
-    leads_data = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    def generate_invalid_email():
-        """Generate different types of invalid emails"""
-        invalid_formats = [
-            f"invalid.email",  
-            f"no@marks@here.com",  
-            f"spaces in@email.com",  
-            f"@nodomain.com", 
-            f".invalid@email.com", 
-            f"missing_dot@domaincom", 
-            f"special#chars@email.com", 
-            "" 
-        ]
-        return random.choice(invalid_formats)
-    
-    for i in range(5):
-        progress = (i + 1) / 5
-        progress_bar.progress(progress)
-        
-        company, industry = random.choice(companies)
-        first_name = random.choice(['John', 'Jane', 'Mike', 'Sarah', 'David', 'Emma', 'Alex', 'Lisa'])
-        last_name = random.choice(['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis'])
-        
-        use_invalid_email = random.random() < 0.4
-        
-        if use_invalid_email:
-            email = generate_invalid_email()
-        else:
-            email = f"{first_name.lower()}.{last_name.lower()}@{company.lower().replace(' ', '')}.com"
-        
-        lead = {
-            'Lead Name': f"{first_name} {last_name}",
-            'Email': email,
-            'Contact Number': f"+1-{random.randint(100,999)}-{random.randint(100,999)}-{random.randint(1000,9999)}",
-            'Company': company,
-            'Industry': industry,
-            'Email Verified': '',
-            'Response Status': '',
-            'Notes': '',
-            'Priority': random.choice(['High', 'Medium', 'Low']),
-            'Last Contact': '',
-            'Created Date': pd.Timestamp.now().strftime('%Y-%m-%d'),
-            'Lead Score': random.randint(1, 100)
-        }
-        leads_data.append(lead)
-        
-        email_status = " " if use_invalid_email else ""
-        status_text.write(f"Generated lead {i+1}/5: {lead['Lead Name']} from {lead['Company']}{email_status}")
-        time.sleep(0.5)
-
-    df = pd.DataFrame(leads_data)
-    filename = f"sales_leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    df.to_excel(filename, index=False)
-    
-    progress_bar.empty()
-    status_text.empty()
+    with st.spinner(f"Generating {st.session_state.sample_size} sample leads..."):
+        df = generate_synthetic_leads(st.session_state.sample_size)
+        filename = f"sales_leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}{WORKING_FORMAT}"
+        save_leads(df, filename)
     
     return filename, df
 
 
-class SupervisorAgent:
-    def __init__(self, df):
-        self.df = df
-        
-    def monitor_leads(self):
-        
-        unverified = self.df[
-            (self.df['Email Verified'].isna()) | 
-            (self.df['Email Verified'] == '')
-        ].index
-        
-        unprocessed = self.df[
-            (self.df['Email Verified'] == 'Y') & 
-            ((self.df['Response Status'].isna()) | 
-             (self.df['Response Status'] == ''))
-        ].index
-        
-        return unverified, unprocessed
-    
-    def assign_tasks(self):
-        unverified, unprocessed = self.monitor_leads()
-        return {
-            'verification_tasks': unverified.tolist(),
-            'outreach_tasks': unprocessed.tolist()
-        }
-    
-    def generate_summary(self):
-        total_leads = len(self.df)
-        verified_leads = len(self.df[self.df['Email Verified'] == 'Y'])
-        responses = self.df['Response Status'].value_counts()
-        interested = responses.get('Interested', 0)
-        not_interested = responses.get('Not Interested', 0)
-        no_response = responses.get('No Response', 0)
-        
-        avg_lead_score = self.df['Lead Score'].mean()
-        high_priority_leads = len(self.df[self.df['Priority'] == 'High'])
-        
-        return {
-            'total_leads': total_leads,
-            'verified_leads': verified_leads,
-            'interested': interested,
-            'not_interested': not_interested,
-            'no_response': no_response,
-            'verification_rate': f"{(verified_leads/total_leads*100):.1f}%" if total_leads > 0 else "0%",
-            'success_rate': f"{(interested/total_leads*100):.1f}%" if total_leads > 0 else "0%",
-            'avg_lead_score': f"{avg_lead_score:.1f}",
-            'high_priority_leads': high_priority_leads
-        }
-class AgentA:
-    @staticmethod
-    def verify_email(email):
-        """Simulate email verification with realistic checks"""
-        time.sleep(1)  
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            return False
-        return random.choice([True, True, True, False]) 
-class AgentB:
-    @staticmethod
-    def send_campaign_email(lead_info):
-        """Simulate sending campaign email"""
-        time.sleep(1)  
-        response_weights = [0.2, 0.3, 0.5]  
-        return np.random.choice(
-            ['Interested', 'Not Interested', 'No Response'],
-            p=response_weights
-        )
-def display_agent_activities():
+def get_supervisor():
+    """Supervisor tracking the current leads_df, rebuilt when the frame is replaced"""
+    supervisor = st.session_state.get('supervisor')
+    if supervisor is None or supervisor.df is not st.session_state.leads_df:
+        supervisor = SupervisorAgent(st.session_state.leads_df)
+        st.session_state.supervisor = supervisor
+    return supervisor
+
+
+PREVIEW_ROWS = 200
+PAGE_SIZES = [25, 50, 100, 200]
+LOG_TAIL = 50
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def display_preview(df, key=None):
+    """Show one window of leads; Streamlit serializes whatever it is given, so never the whole frame.
+
+    Without a key this is the first PREVIEW_ROWS rows. With a key the page,
+    page size and columns are chosen with widgets and only that window is
+    sent to the browser.
+    """
+    if key is None:
+        st.dataframe(df.head(PREVIEW_ROWS), height=200)
+        if len(df) > PREVIEW_ROWS:
+            st.caption(f"Showing the first {PREVIEW_ROWS} of {len(df)} leads")
+        return
+    
+    columns = st.multiselect("Columns", list(df.columns), default=list(df.columns), key=f"{key}_columns")
+    size_col, page_col = st.columns(2)
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    pages = max(1, -(-len(df) // page_size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = page_col.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=f"{key}_page")
+    
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size][columns], height=300)
+    st.caption(f"Rows {min(start + 1, len(df))}–{min(start + page_size, len(df))} of {len(df)}")
+
+
+@st.cache_data(max_entries=8, show_spinner="Reading leads file...")
+def parse_upload(digest, filename, _data):
+    """Parsed leads of an upload, cached by content hash so reruns never parse the same file twice"""
+    return read_leads(io.BytesIO(_data), filename)
+
+
+def display_agent_activities(supervisor=None):
     """Display organized view of agent activities"""
     st.markdown("### 👥 Agent Activities Dashboard")
     
+    if supervisor is None and st.session_state.leads_df is not None:
+        supervisor = get_supervisor()
+    stats = supervisor.stats() if supervisor is not None else None
     supervisor_col, agent_a_col, agent_b_col = st.columns(3)
     
     with supervisor_col:
         st.markdown("#### 🎯 Supervisor Agent")
         with st.container():
             st.markdown("**Current Tasks:**")
-            if st.session_state.leads_df is not None:
-                df = st.session_state.leads_df
-                unverified = len(df[df['Email Verified'].isna() | (df['Email Verified'] == '')])
-                unprocessed = len(df[
-                    (df['Email Verified'] == 'Y') & 
-                    (df['Response Status'].isna() | (df['Response Status'] == ''))
-                ])
-                
-                st.info(f"📋 Pending Verifications: {unverified}")
-                st.info(f"📨 Pending Outreach: {unprocessed}")
+            if stats is not None:
+                st.info(f"📋 Pending Verifications: {stats['pending_verification']}")
+                st.info(f"📨 Pending Outreach: {stats['pending_outreach']}")
                 
                 st.markdown("**Priority Distribution:**")
-                priority_dist = df['Priority'].value_counts()
-                st.progress(float(priority_dist.get('High', 0)) / len(df))
-                st.caption(f"High Priority: {priority_dist.get('High', 0)} leads")
+                high_priority = stats['high_priority_leads']
+                st.progress(float(high_priority) / stats['total_leads'] if stats['total_leads'] else 0.0)
+                st.caption(f"High Priority: {high_priority} leads")
     
     with agent_a_col:
         st.markdown("#### ✉️ Agent A (Email Verification)")
         with st.container():
             st.markdown("**Verification Stats:**")
-            if st.session_state.leads_df is not None:
-                df = st.session_state.leads_df
-                verified = len(df[df['Email Verified'] == 'Y'])
-                failed = len(df[df['Email Verified'] == 'N'])
-                pending = len(df[df['Email Verified'].isna() | (df['Email Verified'] == '')])
+            if stats is not None:
+                verified = stats['verified']
+                failed = stats['failed']
+                pending = stats['pending_verification']
                 
                 st.success(f"✅ Verified: {verified}")
                 st.error(f"❌ Failed: {failed}")
@@ -278,22 +176,83 @@ def display_agent_activities():
         st.markdown("#### 📧 Agent B (Campaign Outreach)")
         with st.container():
             st.markdown("**Response Stats:**")
-            if st.session_state.leads_df is not None:
-                df = st.session_state.leads_df
-                responses = df['Response Status'].value_counts()
+            if stats is not None:
+                responses = stats['responses']
                 
-                st.success(f"👍 Interested: {responses.get('Interested', 0)}")
-                st.error(f"👎 Not Interested: {responses.get('Not Interested', 0)}")
-                st.info(f"⏳ No Response: {responses.get('No Response', 0)}")
+                st.success(f"👍 Interested: {responses['Interested']}")
+                st.error(f"👎 Not Interested: {responses['Not Interested']}")
+                st.info(f"⏳ No Response: {responses['No Response']}")
                 
-                total_responses = sum(responses)
+                total_responses = sum(responses.values())
                 if total_responses > 0:
-                    interest_rate = (responses.get('Interested', 0) / total_responses) * 100
+                    interest_rate = (responses['Interested'] / total_responses) * 100
                     st.progress(interest_rate / 100)
                     st.caption(f"Interest Rate: {interest_rate:.1f}%")
 
-def display_activity_log():
-    """Display organized activity log"""
+def display_breakdowns(supervisor, drill_down=True):
+    """Per-industry and per-company results, optionally drilling into one group's leads"""
+    st.markdown("### 🔎 Campaign Breakdown")
+    if not drill_down:
+        for tab, dimension in zip(st.tabs(list(BREAKDOWN_DIMENSIONS)), BREAKDOWN_DIMENSIONS):
+            with tab:
+                st.dataframe(supervisor.breakdown(dimension).head(PREVIEW_ROWS), height=250)
+        return
+    
+    dimension = st.radio("Break down by", BREAKDOWN_DIMENSIONS, horizontal=True, key='breakdown_dimension')
+    breakdown = supervisor.breakdown(dimension)
+    st.dataframe(breakdown.head(PREVIEW_ROWS), height=250)
+    
+    group = st.selectbox(f"Drill into {dimension.lower()}", breakdown.index[:PREVIEW_ROWS],
+                         key=f"breakdown_group_{dimension}")
+    if group is None:
+        return
+    row = breakdown.loc[group]
+    leads_col, verified_col, success_col, score_col = st.columns(4)
+    leads_col.metric("Leads", int(row['Leads']))
+    verified_col.metric("Verification Rate", f"{row['Verification Rate']:.1f}%")
+    success_col.metric("Success Rate", f"{row['Success Rate']:.1f}%")
+    score_col.metric("Average Lead Score", f"{row['Avg Lead Score']:.1f}")
+    display_preview(supervisor.group_leads(dimension, group), key='breakdown_leads')
+
+
+def display_pipeline_metrics():
+    """Display stage timings, agent latencies, queue depths and cache hit ratios"""
+    snapshot = st.session_state.pipeline_metrics.snapshot()
+    if not snapshot['stages']:
+        return
+    
+    st.markdown("### ⏱️ Pipeline Metrics")
+    stages_col, latency_col, queues_col = st.columns(3)
+    
+    with stages_col:
+        st.markdown("**Stage Timings:**")
+        for stage, timing in sorted(snapshot['stages'].items(), key=lambda item: -item[1]['seconds']):
+            st.caption(f"{stage}: {timing['seconds']:.2f}s over {timing['runs']} runs")
+    
+    with latency_col:
+        st.markdown("**Agent Latency:**")
+        for agent, latency in sorted(snapshot['latency'].items()):
+            st.caption(
+                f"{agent}: {latency['count']} calls, mean {latency['mean'] * 1000:.0f} ms, "
+                f"p95 ≤ {latency['p95'] * 1000:.0f} ms"
+            )
+    
+    with queues_col:
+        st.markdown("**Queues & Caches:**")
+        for queue, depth in sorted(snapshot['queues'].items()):
+            st.caption(f"{queue} queue: {depth} waiting")
+        for cache, ratio in sorted(snapshot['caches'].items()):
+            st.caption(f"{cache} cache: {ratio['hit_ratio']:.0%} hits ({ratio['hits']}/{ratio['hits'] + ratio['misses']})")
+
+
+def publish_metrics():
+    """Write the Prometheus metrics file when exporting is enabled"""
+    if st.session_state.export_metrics:
+        st.session_state.pipeline_metrics.write_prometheus(METRICS_PATH)
+
+
+def display_activity_log(limit=None):
+    """Display organized activity log, newest entries first when limit is set"""
     st.markdown("### 📋 Activity Log")
     
     all_tab, supervisor_tab, agent_a_tab, agent_b_tab = st.tabs([
@@ -308,7 +267,7 @@ def display_activity_log():
     }
     
     with all_tab:
-        all_logs = st.session_state.activity_logger.get_all_logs()
+        all_logs = st.session_state.activity_logger.get_all_logs(limit)
         for agent_type, log in all_logs:
             icon = log_styles.get(agent_type, "")
             status_color = {
@@ -326,163 +285,193 @@ def display_activity_log():
             )
     
     with supervisor_tab:
-        for log in st.session_state.activity_logger.get_agent_logs('supervisor'):
+        for log in st.session_state.activity_logger.get_agent_logs('supervisor', limit):
             st.markdown(
                 f"<div class='log-entry'>[{log['timestamp']}] 🎯 {log['message']}</div>",
                 unsafe_allow_html=True
             )
     
     with agent_a_tab:
-        for log in st.session_state.activity_logger.get_agent_logs('agent_a'):
+        for log in st.session_state.activity_logger.get_agent_logs('agent_a', limit):
             st.markdown(
                 f"<div class='log-entry'>[{log['timestamp']}] ✉️ {log['message']}</div>",
                 unsafe_allow_html=True
             )
     
     with agent_b_tab:
-        for log in st.session_state.activity_logger.get_agent_logs('agent_b'):
+        for log in st.session_state.activity_logger.get_agent_logs('agent_b', limit):
             st.markdown(
                 f"<div class='log-entry'>[{log['timestamp']}] 📧 {log['message']}</div>",
                 unsafe_allow_html=True
             )
 
 
+def display_campaign_results(summary):
+    """Show the campaign summary metrics"""
+    st.success("✅ Processing completed!")
+    
+    st.markdown("### 📊 Campaign Results")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Leads Processed", summary['total_leads'])
+        st.metric("Verification Rate", summary['verification_rate'])
+    with col2:
+        st.metric("Interested Leads", summary['interested'])
+        st.metric("Success Rate", summary['success_rate'])
+    with col3:
+        st.metric("Average Lead Score", summary['avg_lead_score'])
+        st.metric("High Priority Leads", summary['high_priority_leads'])
+
+
+def export_download(path):
+    """XLSX bytes of a Parquet working file, timed as the export stage"""
+    with st.session_state.pipeline_metrics.timer('export_xlsx'):
+        return export_xlsx_bytes(read_leads(path, path.name))
+
+
+def offer_download(output_filename):
+    """Download button for a processed leads file; Parquet working files download as XLSX"""
+    path = Path(output_filename)
+    if path.suffix == WORKING_FORMAT:
+        st.download_button(
+            label=" Download Updated Leads File ",
+            data=lambda: export_download(path),
+            file_name=f"{path.stem}.xlsx",
+            mime=XLSX_MIME
+        )
+        return
+    
+    mime = "text/csv" if path.suffix == '.csv' else XLSX_MIME
+    with open(path, "rb") as file:
+        st.download_button(
+            label=" Download Updated Leads File ",
+            data=file,
+            file_name=path.name,
+            mime=mime
+        )
+
+
+def profile_run():
+    """Profiler context for one workflow run as chosen in the sidebar, logging where the report went"""
+    profiler = st.session_state.profiler
+    if profiler == 'off':
+        return nullcontext()
+    suffix = '.html' if profiler == 'pyinstrument' else '.prof'
+    path = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+    st.session_state.activity_logger.add_log('system', f"Profiling this run with {profiler} into {path}", 'info')
+    return profiled(profiler, path)
+
+
 def run_automated_workflow():
     """Run the automated workflow with visual feedback"""
     if st.session_state.leads_df is None:
         st.error("No leads data available!")
         return
 
-    supervisor = SupervisorAgent(st.session_state.leads_df)
+    to_typed_leads(st.session_state.leads_df)
+    supervisor = get_supervisor()
     logger = st.session_state.activity_logger
+    metrics = st.session_state.pipeline_metrics
     
     logger.clear_logs()
-    logger.add_log('system', f"Processing file: {st.session_state.current_file}", 'info')
+    metrics.reset()
     
     
     progress_placeholder = st.empty()
     table_placeholder = st.empty()
-    activities_container = st.container()
-    log_container = st.container()
+    activities_placeholder = st.empty()
+    log_placeholder = st.empty()
     
     
-    with table_placeholder:
+    with table_placeholder.container():
         st.markdown("### Data Preview")
-        st.dataframe(st.session_state.leads_df, height=200)
-    
-    initial_tasks = supervisor.assign_tasks()
-    verification_tasks = initial_tasks['verification_tasks']
-    
-    if len(verification_tasks) == 0 and len(initial_tasks['outreach_tasks']) == 0:
-        logger.add_log('supervisor', "No tasks to process", 'info')
-        with activities_container:
-            display_agent_activities()
-        with log_container:
-            display_activity_log()
-        return
-    
-    logger.add_log('supervisor', f"Starting email verification for {len(verification_tasks)} leads", 'info')
-    completed_tasks = 0
-    total_verification_tasks = len(verification_tasks)
-    
-   
-    for idx in verification_tasks:
-        lead = st.session_state.leads_df.loc[idx]
-        logger.add_log('agent_a', f"Verifying email for {lead['Lead Name']}", 'info')
-        
-        is_valid = AgentA.verify_email(lead['Email'])
-        st.session_state.leads_df.at[idx, 'Email Verified'] = 'Y' if is_valid else 'N'
-        
-      
-        with table_placeholder:
-            st.markdown("### Data Preview")
-            st.dataframe(st.session_state.leads_df, height=200)
-        
-        completed_tasks += 1
-        progress = min(completed_tasks / (total_verification_tasks * 2), 0.5)
+        display_preview(st.session_state.leads_df)
+    
+    leads_df = st.session_state.leads_df
+    scheduler = RefreshScheduler(
+        interval_ms=st.session_state.refresh_interval_ms,
+        every_leads=st.session_state.refresh_every
+    )
+    
+    def refresh(force=False):
+        """Redraw the live views if the scheduler says they are due"""
+        if not (force or scheduler.due()):
+            return
+        changed = scheduler.take_changed()
+        with metrics.timer('render'):
+            with table_placeholder.container():
+                st.markdown("### Recently Updated Leads")
+                st.dataframe(leads_df.loc[changed[-PREVIEW_ROWS:]], height=200)
+            with activities_placeholder.container():
+                display_agent_activities()
+                display_pipeline_metrics()
+            with log_placeholder.container():
+                display_activity_log(limit=LOG_TAIL)
+        publish_metrics()
+    
+    def on_batch(stage, completed, total, changed, processed):
+        if stage == 'verification':
+            progress = min(completed / (total * 2), 0.5)
+        else:
+            progress = 0.5 + (completed / total * 0.5)
         progress_placeholder.progress(progress)
-        
-        status = 'success' if is_valid else 'error'
-        logger.add_log('agent_a', 
-                      f"Email verification {'successful' if is_valid else 'failed'} for {lead['Lead Name']}", 
-                      status)
-        
-        with activities_container:
-            display_agent_activities()
-        with log_container:
-            display_activity_log()
-        
-        time.sleep(1)
-    
-    
-    updated_tasks = supervisor.assign_tasks()
-    outreach_tasks = updated_tasks['outreach_tasks']
+        scheduler.record(changed, processed=processed)
+        refresh()
     
-    if outreach_tasks:
-        logger.add_log('supervisor', f"Starting email campaign for {len(outreach_tasks)} verified leads", 'info')
-        outreach_completed = 0
-        total_outreach = len(outreach_tasks)
-        
-        for idx in outreach_tasks:
-            lead = st.session_state.leads_df.loc[idx]
-            logger.add_log('agent_b', f"Sending campaign email to {lead['Lead Name']}", 'info')
-            
-            response = AgentB.send_campaign_email(lead)
-            st.session_state.leads_df.at[idx, 'Response Status'] = response
-            st.session_state.leads_df.at[idx, 'Last Contact'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            
-            with table_placeholder:
-                st.markdown("### Data Preview")
-                st.dataframe(st.session_state.leads_df, height=200)
-            
-            outreach_completed += 1
-            progress = 0.5 + (outreach_completed / total_outreach * 0.5)
-            progress_placeholder.progress(progress)
-            
-            status = 'success' if response == 'Interested' else 'info'
-            logger.add_log('agent_b', 
-                          f"Campaign email sent to {lead['Lead Name']} - Response: {response}", 
-                          status)
-            
-            with activities_container:
-                display_agent_activities()
-            with log_container:
-                display_activity_log()
-            
-            time.sleep(1)
+    with profile_run():
+        supervisor, output_filename = run_workflow(
+            leads_df, st.session_state.current_file, st.session_state, logger,
+            on_batch=on_batch, supervisor=supervisor, metrics=metrics
+        )
+    refresh(force=True)
+    publish_metrics()
+    if output_filename is None:
+        return
     
+    with table_placeholder.container():
+        st.markdown("### Data Preview")
+        display_preview(leads_df)
     progress_placeholder.progress(1.0)
     
     
-    summary = supervisor.generate_summary()
-    st.success("✅ Processing completed!")
-    
-    st.markdown("### 📊 Campaign Results")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Total Leads Processed", summary['total_leads'])
-        st.metric("Verification Rate", summary['verification_rate'])
-    with col2:
-        st.metric("Interested Leads", summary['interested'])
-        st.metric("Success Rate", summary['success_rate'])
-    with col3:
-        st.metric("Average Lead Score", summary['avg_lead_score'])
-        st.metric("High Priority Leads", summary['high_priority_leads'])
-    
-    output_filename = f"processed_{st.session_state.current_file}"
-    st.session_state.leads_df.to_excel(output_filename, index=False)
-    logger.add_log('system', f"Updated leads file saved as '{output_filename}'", 'success')
-    
-    with open(output_filename, "rb") as file:
-        st.download_button(
-            label=" Download Updated Leads File ",
-            data=file,
-            file_name=output_filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    display_campaign_results(supervisor.generate_summary())
+    offer_download(output_filename)
 
 
+def run_streaming_workflow(uploaded_file):
+    """Process an upload chunk by chunk, writing each processed chunk out as it completes"""
+    logger = st.session_state.activity_logger
+    metrics = st.session_state.pipeline_metrics
+    logger.clear_logs()
+    metrics.reset()
+    
+    status_placeholder = st.empty()
+    activities_placeholder = st.empty()
+    log_placeholder = st.empty()
+    
+    def on_chunk(campaign, leads_done, chunks):
+        status_placeholder.info(f"⏳ Processed {leads_done} leads ({chunks} chunks)")
+        with metrics.timer('render'):
+            with activities_placeholder.container():
+                display_agent_activities(campaign)
+                display_pipeline_metrics()
+            with log_placeholder.container():
+                display_activity_log(limit=LOG_TAIL)
+        publish_metrics()
+    
+    with profile_run():
+        campaign, output_filename = stream_workflow(
+            uploaded_file, uploaded_file.name, st.session_state, logger, on_chunk=on_chunk, metrics=metrics
+        )
+    publish_metrics()
+    if campaign is None:
+        status_placeholder.warning("The uploaded file contains no leads")
+        return
+    
+    status_placeholder.empty()
+    display_campaign_results(campaign.generate_summary())
+    display_breakdowns(campaign, drill_down=False)
+    offer_download(output_filename)
 
 
 def main():
@@ -506,17 +495,52 @@ def main():
         
         """)
     
+    with st.sidebar:
+        st.markdown("### ⚙️ Processing Settings")
+        st.number_input("Verification workers", min_value=1, max_value=256, key='verify_workers')
+        st.number_input("Verification timeout (s)", min_value=1.0, max_value=120.0, key='verify_timeout')
+        st.checkbox("Cache verification results", key='use_verification_cache')
+        st.number_input("Outreach workers", min_value=1, max_value=256, key='send_workers')
+        st.number_input("Send rate limit (emails/s)", min_value=0.1, max_value=1000.0, key='send_rate_limit')
+        st.number_input("Send retries", min_value=0, max_value=10, key='send_retries')
+        st.text_input("Verification backend", key='verify_backend',
+                      help="simulated, fake://?latency_ms=N or the URL of a bulk verification API")
+        st.text_input("Send backend", key='send_backend',
+                      help="simulated, fake://?latency_ms=N, sink:// (in-process SMTP sink) or smtp://host:port")
+        st.number_input("Leads per backend call", min_value=1, max_value=1000, key='bulk_size',
+                        help="Verify or send this many leads per request / SMTP session")
+        st.number_input("UI refresh interval (ms)", min_value=50, max_value=10000, step=50, key='refresh_interval_ms')
+        st.number_input("UI refresh every N leads", min_value=1, max_value=100000, key='refresh_every')
+        st.number_input("Priority weight", min_value=0.0, max_value=1000.0, key='priority_weight',
+                        help="Scheduling weight per Priority level (Low=0, Medium=1, High=2)")
+        st.number_input("Lead score weight", min_value=0.0, max_value=1000.0, key='score_weight',
+                        help="Scheduling weight per Lead Score point")
+        st.checkbox("Merge duplicate leads", key='deduplicate',
+                    help="Process leads with the same email (or, without an email, the same phone number) once")
+        st.checkbox("Resume interrupted runs", key='resume_runs',
+                    help="Skip leads already verified or contacted in a checkpointed run of the same file")
+        st.checkbox("Stream uploads in chunks", key='streaming_mode',
+                    help="Process large uploads chunk by chunk instead of loading the whole file")
+        st.number_input("Chunk size (rows)", min_value=100, max_value=1000000, step=100, key='chunk_size')
+        st.number_input("Write-back batch (leads)", min_value=1, max_value=1000000, key='flush_every',
+                        help="Agent results are buffered and written to the table this many at a time")
+        st.checkbox("Write Prometheus metrics file", key='export_metrics',
+                    help=f"Keep {METRICS_PATH} up to date for a scraper or node_exporter's textfile collector")
+        st.selectbox("Profile runs", ['off', 'cprofile', 'pyinstrument'], key='profiler',
+                     help="Save a cProfile (.prof) or pyinstrument (.html) report for each run")
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.markdown("### 📁 Data Management")
 
+        st.number_input("Sample size", min_value=1, max_value=1000000, key='sample_size')
         if st.button(" Generate Sample Leads Data "):
             try:
                 filename, df = generate_sample_data()
                 st.session_state.leads_df = df
                 st.session_state.current_file = filename
+                st.session_state.upload_digest = None
                 st.session_state.show_process_button = True
                 st.session_state.activity_logger.clear_logs()
                 st.session_state.activity_logger.add_log('system', f"Sample leads data generated and saved as {filename}", 'success')
@@ -525,7 +549,7 @@ def main():
                 st.session_state.table_container = st.empty()
                 with st.session_state.table_container:
                     st.markdown("###  Data Preview")
-                    st.dataframe(df, height=200)
+                    display_preview(df)
                         
             except Exception as e:
                 st.error(f"Error generating sample data: {str(e)}")
@@ -537,19 +561,34 @@ def main():
     
     with col2:
         st.markdown("## Upload Your Own Data")
-        uploaded_file = st.file_uploader("Upload XLSX file", type=['xlsx'])
+        uploaded_file = st.file_uploader("Upload XLSX, CSV or Parquet file", type=['xlsx', 'csv', 'parquet'])
         
-        if uploaded_file:
+        if uploaded_file and st.session_state.streaming_mode:
+            st.session_state.leads_df = None
+            st.session_state.upload_digest = None
+            st.session_state.current_file = uploaded_file.name
+            st.caption(f"{uploaded_file.name} will be processed in chunks of {st.session_state.chunk_size} rows")
+            
+            if st.button("▶️ Process Uploaded Data"):
+                try:
+                    run_streaming_workflow(uploaded_file)
+                except Exception as e:
+                    st.error(f"Error processing file: {str(e)}")
+        
+        elif uploaded_file:
             try:
-                df = pd.read_excel(uploaded_file)
-                st.session_state.leads_df = df
-                st.session_state.current_file = uploaded_file.name
-                st.session_state.activity_logger.clear_logs()
-                st.session_state.activity_logger.add_log('system', "Custom file uploaded successfully", 'success')
+                data = uploaded_file.getvalue()
+                digest = hashlib.sha256(data).hexdigest()
+                if digest != st.session_state.upload_digest:
+                    st.session_state.leads_df = parse_upload(digest, uploaded_file.name, data)
+                    st.session_state.current_file = uploaded_file.name
+                    st.session_state.upload_digest = digest
+                    st.session_state.activity_logger.clear_logs()
+                    st.session_state.activity_logger.add_log('system', "Custom file uploaded successfully", 'success')
                 
                 
                 st.markdown("### Data Preview")
-                st.dataframe(df, height=200)
+                display_preview(st.session_state.leads_df, key='upload_preview')
                 
                
                 if st.button("▶️ Process Uploaded Data"):
@@ -561,6 +600,8 @@ def main():
     
     if st.session_state.leads_df is not None:
         display_agent_activities()
+        display_breakdowns(get_supervisor())
+        display_pipeline_metrics()
         display_activity_log()
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""Benchmark the verify→outreach pipeline on synthetic leads.
+
+Times each stage of the engine at one or more lead counts and reports wall
+time, throughput and peak Python memory, so regressions show up before they
+reach a real campaign:
+
+    python benchmark.py --sizes 10000 100000 1000000
+    python benchmark.py --sizes 50000 --latency-ms 5 --workers 64 --json
+
+The agents are replaced by the fake backends with a fixed latency, so the
+numbers measure the engine rather than the simulated network; pass backend
+specs (see backends.py) to measure something else, e.g. the SMTP path:
+
+    python benchmark.py --sizes 20000 --send-backend sink:// --bulk-size 50
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from engine import (
+    OutreachDispatcher, ResultBuffer, SupervisorAgent, VerificationEngine, export_xlsx_bytes,
+    generate_synthetic_leads, get_send_backend, get_verification_backend, prevalidate_emails, read_leads,
+    save_leads
+)
+
+XLSX_LIMIT = 20000
+
+
+class Stage:
+    """Context manager timing one benchmark stage"""
+
+    def __init__(self, results, size, name, rows, memory=True):
+        self.results = results
+        self.size = size
+        self.name = name
+        self.rows = rows
+        self.memory = memory
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        peak = None
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.results.append({
+            'size': self.size,
+            'stage': self.name,
+            'rows': self.rows,
+            'seconds': elapsed,
+            'rows_per_second': self.rows / elapsed if elapsed else float('inf'),
+            'peak_mb': peak / 2 ** 20 if peak is not None else None
+        })
+
+
+def run_size(size, args, results):
+    memory = not args.no_memory
+
+    def stage(name, rows=size):
+        return Stage(results, size, name, rows, memory)
+
+    with stage('generate'):
+        df = generate_synthetic_leads(size, invalid_ratio=args.invalid_ratio, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in ['.csv', '.parquet']:
+            path = os.path.join(tmp, 'leads' + suffix)
+            save_leads(df, path)
+            with stage('ingest ' + suffix[1:]):
+                with open(path, 'rb') as f:
+                    read_leads(io.BytesIO(f.read()), path)
+
+        with stage('export parquet'):
+            save_leads(df, os.path.join(tmp, 'processed.parquet'))
+
+    if size <= XLSX_LIMIT:
+        with stage('export xlsx'):
+            export_xlsx_bytes(df)
+
+    with stage('prevalidate'):
+        prevalidate_emails(df)
+
+    with stage('supervisor'):
+        supervisor = SupervisorAgent(df)
+        tasks = supervisor.assign_tasks()
+
+    fake = f"fake://?latency_ms={args.latency_ms}"
+    verifier = get_verification_backend(args.verify_backend or fake, pool_size=args.workers)
+    sender = get_send_backend(args.send_backend or fake, pool_size=args.workers)
+    pending = tasks['verification_tasks'][:args.agent_rows]
+    verification = VerificationEngine(
+        bulk_verifier=verifier.check_mailboxes, domain_checker=verifier.check_domain,
+        max_workers=args.workers, timeout=None, batch_size=args.workers, bulk_size=args.bulk_size
+    )
+    buffer = ResultBuffer(df)
+    emails = df.loc[pending, 'Email'].to_dict()
+    with stage('verify', len(pending)):
+        for batch in verification.run((idx, emails[idx]) for idx in pending):
+            buffer.add_verifications(batch)
+            supervisor.record_verifications(batch)
+        buffer.flush()
+
+    outreach = supervisor.assign_tasks()['outreach_tasks']
+    dispatcher = OutreachDispatcher(
+        bulk_sender=sender.send_many, max_workers=args.workers, rate_limit=None, timeout=None,
+        batch_size=args.workers, bulk_size=args.bulk_size
+    )
+    leads = df.loc[outreach].to_dict('index')
+    with stage('outreach', len(outreach)):
+        for batch in dispatcher.run((idx, leads[idx]) for idx in outreach):
+            buffer.add_responses(batch, pd.Timestamp.now().floor('s'))
+            supervisor.record_responses(batch)
+        buffer.flush()
+    verifier.close()
+    sender.close()
+
+    with stage('summary'):
+        supervisor.generate_summary()
+
+
+def print_table(results):
+    print(f"{'size':>10}  {'stage':<16}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak MB':>10}")
+    for row in results:
+        peak = f"{row['peak_mb']:.1f}" if row['peak_mb'] is not None else '-'
+        print(f"{row['size']:>10}  {row['stage']:<16}{row['rows']:>10}{row['seconds']:>10.3f}"
+              f"{row['rows_per_second']:>12.0f}{peak:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lead pipeline on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help="lead counts to benchmark")
+    parser.add_argument('--latency-ms', type=float, default=1.0,
+                        help="simulated latency of every agent call")
+    parser.add_argument('--workers', type=int, default=32, help="verification and outreach workers")
+    parser.add_argument('--verify-backend', metavar='SPEC', help="verification backend (default: fake)")
+    parser.add_argument('--send-backend', metavar='SPEC', help="send backend (default: fake)")
+    parser.add_argument('--bulk-size', type=int, default=1, help="leads per backend call")
+    parser.add_argument('--invalid-ratio', type=float, default=0.4,
+                        help="share of leads with malformed emails")
+    parser.add_argument('--agent-rows', type=int, default=5000,
+                        help="cap on leads sent through verification and outreach")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip tracemalloc, which slows the stages down")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size} leads...", file=sys.stderr)
+        run_size(size, args, results)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Command-line batch runner for the verify→outreach pipeline.
+
+Runs the same engine as the Streamlit UI without importing Streamlit, so it
+can be scheduled from cron or a job runner:
+
+    python cli.py leads.xlsx --verify-workers 32 --send-rate-limit 50
+    python cli.py big_export.csv --stream --chunk-size 20000
+    python cli.py leads.csv --verify-backend 'fake://?latency_ms=20' --send-backend sink:// --bulk-size 50
+    python cli.py leads.csv --metrics-file /var/lib/node_exporter/leads.prom --profile cprofile
+"""
+import argparse
+import sys
+from contextlib import nullcontext
+
+from engine import (
+    BREAKDOWN_DIMENSIONS, DEFAULT_SETTINGS, ActivityLogger, PipelineMetrics, RefreshScheduler, make_settings, profiled,
+    read_leads, run_workflow, run_sharded_workflow, stream_workflow
+)
+
+SUMMARY_FIELDS = [
+    ("Total Leads Processed", 'total_leads'),
+    ("Verification Rate", 'verification_rate'),
+    ("Interested Leads", 'interested'),
+    ("Success Rate", 'success_rate'),
+    ("Average Lead Score", 'avg_lead_score'),
+    ("High Priority Leads", 'high_priority_leads'),
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verify and contact the leads in an XLSX, CSV or Parquet file")
+    parser.add_argument('path', help="leads file to process")
+    parser.add_argument('--stream', action='store_true',
+                        help="process the file chunk by chunk instead of loading it whole")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_SETTINGS['chunk_size'])
+    parser.add_argument('--flush-every', type=int, default=DEFAULT_SETTINGS['flush_every'],
+                        help="write buffered agent results to the table every N leads")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="split the leads by email domain across this many worker processes")
+    parser.add_argument('--verify-workers', type=int, default=DEFAULT_SETTINGS['verify_workers'])
+    parser.add_argument('--verify-timeout', type=float, default=DEFAULT_SETTINGS['verify_timeout'])
+    parser.add_argument('--no-cache', action='store_true', help="do not use the verification cache")
+    parser.add_argument('--send-workers', type=int, default=DEFAULT_SETTINGS['send_workers'])
+    parser.add_argument('--send-rate-limit', type=float, default=DEFAULT_SETTINGS['send_rate_limit'],
+                        help="maximum emails sent per second (0 for no limit)")
+    parser.add_argument('--send-retries', type=int, default=DEFAULT_SETTINGS['send_retries'])
+    parser.add_argument('--verify-backend', default=DEFAULT_SETTINGS['verify_backend'], metavar='SPEC',
+                        help="simulated, fake://?latency_ms=N or http(s)://host/path of a bulk verification API")
+    parser.add_argument('--send-backend', default=DEFAULT_SETTINGS['send_backend'], metavar='SPEC',
+                        help="simulated, fake://?latency_ms=N, sink:// or smtp://[user:pass@]host:port[?starttls=1]")
+    parser.add_argument('--bulk-size', type=int, default=DEFAULT_SETTINGS['bulk_size'],
+                        help="leads per backend call (bulk verification request or SMTP session)")
+    parser.add_argument('--priority-weight', type=float, default=DEFAULT_SETTINGS['priority_weight'],
+                        help="scheduling weight per Priority level (Low=0, Medium=1, High=2)")
+    parser.add_argument('--score-weight', type=float, default=DEFAULT_SETTINGS['score_weight'],
+                        help="scheduling weight per Lead Score point")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="process duplicate leads (same email, or same phone when there is no email) separately")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="ignore checkpointed results from an interrupted run of this file")
+    parser.add_argument('--progress-interval', type=int, default=2000, metavar='MS',
+                        help="milliseconds between progress lines")
+    parser.add_argument('--breakdown', choices=BREAKDOWN_DIMENSIONS,
+                        help="also print the results per industry or company")
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help="keep Prometheus-format pipeline metrics in this file during the run")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="profile the run and save the report")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="profile report path (default profile.prof, or profile.html for pyinstrument)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="print every activity log entry")
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.stream and args.shards > 1:
+        parser.error("--stream and --shards cannot be combined")
+    return args
+
+
+def settings_from_args(args):
+    return make_settings(
+        verify_workers=args.verify_workers,
+        verify_timeout=args.verify_timeout,
+        use_verification_cache=not args.no_cache,
+        send_workers=args.send_workers,
+        send_rate_limit=args.send_rate_limit,
+        send_retries=args.send_retries,
+        verify_backend=args.verify_backend,
+        send_backend=args.send_backend,
+        bulk_size=args.bulk_size,
+        resume_runs=not args.no_resume,
+        deduplicate=not args.no_dedup,
+        priority_weight=args.priority_weight,
+        score_weight=args.score_weight,
+        chunk_size=args.chunk_size,
+        flush_every=args.flush_every
+    )
+
+
+class ProgressReporter:
+    """Print throttled progress lines (and, if verbose, new log entries) to stderr"""
+
+    def __init__(self, logger, interval_ms, verbose=False, metrics=None, metrics_file=None):
+        self.logger = logger
+        self.verbose = verbose
+        self.metrics = metrics
+        self.metrics_file = metrics_file
+        self.scheduler = RefreshScheduler(interval_ms=interval_ms, every_leads=sys.maxsize)
+        self.last_seq = -1
+
+    def emit(self, line):
+        if self.verbose:
+            for agent_type, log in self.logger.get_logs_since(self.last_seq):
+                print(f"[{log['timestamp']}] {agent_type:<10} {log['message']}", file=sys.stderr)
+                self.last_seq = log['seq']
+        print(line, file=sys.stderr)
+        if self.metrics_file:
+            self.metrics.write_prometheus(self.metrics_file)
+
+    def on_batch(self, stage, completed, total, changed, processed):
+        self.scheduler.record(changed, processed=processed)
+        if self.scheduler.due() or completed == total:
+            self.scheduler.take_changed()
+            self.emit(f"{stage}: {completed}/{total} leads")
+
+    def on_shard(self, campaign, shards_done, shards):
+        stats = campaign.stats()
+        self.emit(f"shard {shards_done}/{shards}: {stats['total_leads']} leads processed, "
+                  f"{stats['verified']} verified, {stats['responses']['Interested']} interested")
+
+    def on_chunk(self, campaign, leads_done, chunks):
+        stats = campaign.stats()
+        self.emit(f"chunk {chunks}: {leads_done} leads processed, "
+                  f"{stats['verified']} verified, {stats['responses']['Interested']} interested")
+
+
+def print_summary(summary, output_filename):
+    print("Campaign Results")
+    for label, key in SUMMARY_FIELDS:
+        print(f"  {label:<24}{summary[key]}")
+    print(f"Updated leads file saved as '{output_filename}'")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings = settings_from_args(args)
+    logger = ActivityLogger()
+    metrics = PipelineMetrics()
+    reporter = ProgressReporter(logger, args.progress_interval, args.verbose, metrics, args.metrics_file)
+    
+    profile = nullcontext()
+    if args.profile:
+        profile_output = args.profile_output or ('profile.html' if args.profile == 'pyinstrument' else 'profile.prof')
+        profile = profiled(args.profile, profile_output)
+    
+    with profile:
+        if args.stream:
+            supervisor, output_filename = stream_workflow(
+                args.path, args.path, settings, logger, on_chunk=reporter.on_chunk, metrics=metrics
+            )
+        elif args.shards > 1:
+            with metrics.timer('ingest'):
+                leads_df = read_leads(args.path, args.path)
+            supervisor, output_filename = run_sharded_workflow(
+                leads_df, args.path, settings, logger, args.shards, on_shard=reporter.on_shard, metrics=metrics
+            )
+        else:
+            with metrics.timer('ingest'):
+                leads_df = read_leads(args.path, args.path)
+            supervisor, output_filename = run_workflow(
+                leads_df, args.path, settings, logger, on_batch=reporter.on_batch, metrics=metrics
+            )
+    reporter.emit("Processing completed")
+    if args.profile:
+        print(f"Profile saved as '{profile_output}'", file=sys.stderr)
+    
+    if supervisor is None or output_filename is None:
+        print("No tasks to process")
+        return 0
+    print_summary(supervisor.generate_summary(), output_filename)
+    if args.breakdown:
+        print()
+        print(supervisor.breakdown(args.breakdown).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2127 @@
+"""Headless lead-processing engine: agents, supervisor, storage and the verify→outreach pipeline.
+
+Nothing here imports Streamlit, so the pipeline can run from the CLI
+(cli.py), cron jobs or worker processes as well as behind the web UI.
+openpyxl and pyarrow.parquet are imported where they are used, so only
+runs that touch XLSX or chunked Parquet files pay for them.
+"""
+import pandas as pd
+import time
+from datetime import datetime
+import random
+import re
+from pathlib import Path
+import numpy as np
+import io
+import json
+import os
+import threading
+import itertools
+import sqlite3
+import heapq
+import cProfile
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from collections import ChainMap, Counter, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from types import SimpleNamespace
+
+from backends import BulkProgress, SendBackend, VerificationBackend, send_backend, send_each, verification_backend
+
+DEFAULT_SETTINGS = {
+    'verify_workers': 16,
+    'verify_timeout': 10.0,
+    'use_verification_cache': True,
+    'send_workers': 16,
+    'send_rate_limit': 20.0,
+    'send_retries': 3,
+    'resume_runs': True,
+    'deduplicate': True,
+    'priority_weight': 100.0,
+    'score_weight': 1.0,
+    'chunk_size': 5000,
+    'flush_every': 500,
+    'verify_backend': 'simulated',
+    'send_backend': 'simulated',
+    'bulk_size': 1,
+}
+
+
+def make_settings(**overrides):
+    """Pipeline settings object: DEFAULT_SETTINGS with overrides applied"""
+    return SimpleNamespace(**{**DEFAULT_SETTINGS, **overrides})
+
+
+LOG_CAPACITY = 5000
+
+
+class ActivityLogger:
+    """Activity log kept in fixed-capacity ring buffers.
+
+    Every entry gets a monotonic sequence number and is appended both to the
+    merged stream and to its agent's stream, so both are always in arrival
+    order and reading the newest N entries costs O(N). Once capacity is
+    reached the oldest entries are dropped, keeping memory flat.
+    """
+
+    AGENT_TYPES = ('supervisor', 'agent_a', 'agent_b', 'system')
+
+    def __init__(self, capacity=LOG_CAPACITY):
+        self.capacity = capacity
+        self.clear_logs()
+    
+    def add_log(self, agent_type, message, status='info'):
+        entry = {
+            'seq': next(self.sequence),
+            'time': time.monotonic(),
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'message': message,
+            'status': status
+        }
+        self.logs[agent_type].append(entry)
+        self.merged.append((agent_type, entry))
+
+    def get_agent_logs(self, agent_type, limit=None):
+        """Entries for one agent, oldest first; only the newest limit when given"""
+        logs = self.logs[agent_type]
+        if limit is None:
+            return list(logs)
+        return list(itertools.islice(reversed(logs), limit))[::-1]
+
+    def get_all_logs(self, limit=None):
+        """(agent_type, entry) pairs across all agents, newest first"""
+        return list(itertools.islice(reversed(self.merged), limit))
+
+    def get_logs_since(self, seq):
+        """(agent_type, entry) pairs added after sequence number seq, oldest first"""
+        newer = itertools.takewhile(lambda item: item[1]['seq'] > seq, reversed(self.merged))
+        return list(newer)[::-1]
+
+    def clear_logs(self):
+        self.logs = {agent_type: deque(maxlen=self.capacity) for agent_type in self.AGENT_TYPES}
+        self.merged = deque(maxlen=self.capacity)
+        self.sequence = itertools.count()
+
+
+METRICS_PATH = 'pipeline_metrics.prom'
+METRICS_PREFIX = 'leads_'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class PipelineMetrics:
+    """Thread-safe hot-path instrumentation for the pipeline.
+
+    Collects per-stage timers, agent latency histograms, queue depth gauges
+    and cache hit/miss counters, each keyed by a metric name and labels.
+    snapshot() feeds the UI panel and to_prometheus() renders the Prometheus
+    text format for a scraper or node_exporter's textfile collector.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = Counter()
+            self.gauges = {}
+            self.histograms = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        with self.lock:
+            self.counters[self._key(name, labels)] += amount
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one observation in a LATENCY_BUCKETS histogram"""
+        bucket = next(i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound)
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                self._key(name, labels), {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+            )
+            histogram['buckets'][bucket] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        """Add the wall time of the with-block to the stage's running total"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc('stage_seconds', time.perf_counter() - started, stage=stage)
+            self.inc('stage_runs', stage=stage)
+
+    def timed(self, func, agent):
+        """Wrap func so every call's latency is observed under agent"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe('agent_latency_seconds', time.perf_counter() - started, agent=agent)
+        return wrapper
+
+    def timed_iter(self, iterable, stage):
+        """Yield from iterable, timing only the waits for each next item under stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.timer(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def record_cache(self, cache, hits, misses):
+        self.inc('cache_hits', hits, cache=cache)
+        self.inc('cache_misses', misses, cache=cache)
+
+    def merge(self, other):
+        """Fold another process's metrics into this one and return self"""
+        with self.lock:
+            self.counters.update(other.counters)
+            self.gauges.update(other.gauges)
+            for key, theirs in other.histograms.items():
+                ours = self.histograms.setdefault(
+                    key, {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+                )
+                ours['buckets'] = [a + b for a, b in zip(ours['buckets'], theirs['buckets'])]
+                ours['sum'] += theirs['sum']
+                ours['count'] += theirs['count']
+        return self
+
+    @staticmethod
+    def _quantile(histogram, q):
+        """Upper bound of the bucket holding the q-quantile"""
+        rank = q * histogram['count']
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+            seen += count
+            if seen >= rank:
+                return bound
+        return LATENCY_BUCKETS[-1]
+
+    def snapshot(self):
+        """Plain dict of stages, agent latencies, queue depths and cache ratios"""
+        with self.lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {key: dict(value, buckets=list(value['buckets'])) for key, value in self.histograms.items()}
+        
+        stages = {}
+        caches = {}
+        for (name, labels), value in counters.items():
+            labels = dict(labels)
+            if name in ('stage_seconds', 'stage_runs'):
+                stages.setdefault(labels['stage'], {'seconds': 0.0, 'runs': 0})[name[6:]] = value
+            elif name in ('cache_hits', 'cache_misses'):
+                caches.setdefault(labels['cache'], {'hits': 0, 'misses': 0})[name[6:]] = value
+        for cache in caches.values():
+            lookups = cache['hits'] + cache['misses']
+            cache['hit_ratio'] = cache['hits'] / lookups if lookups else 0.0
+        
+        latency = {}
+        for (name, labels), histogram in histograms.items():
+            count = histogram['count']
+            latency[dict(labels)['agent']] = {
+                'count': count,
+                'mean': histogram['sum'] / count if count else 0.0,
+                'p50': self._quantile(histogram, 0.5),
+                'p95': self._quantile(histogram, 0.95)
+            }
+        
+        queues = {dict(labels)['queue']: value for (name, labels), value in gauges.items() if name == 'queue_depth'}
+        return {'stages': stages, 'latency': latency, 'queues': queues, 'caches': caches}
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        def labelled(name, labels, extra=()):
+            pairs = ','.join(f'{key}="{value}"' for key, value in (*labels, *extra))
+            return f"{METRICS_PREFIX}{name}{{{pairs}}}" if pairs else f"{METRICS_PREFIX}{name}"
+        
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+        
+        lines = []
+        typed = set()
+        for kind, items in (('counter', counters), ('gauge', gauges)):
+            for (name, labels), value in items:
+                metric = name + '_total' if kind == 'counter' else name
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {METRICS_PREFIX}{metric} {kind}")
+                lines.append(f"{labelled(metric, labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {METRICS_PREFIX}{name} histogram")
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{labelled(name + '_bucket', labels, [('le', le)])} {cumulative}")
+            lines.append(f"{labelled(name + '_sum', labels)} {histogram['sum']}")
+            lines.append(f"{labelled(name + '_count', labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=METRICS_PATH):
+        """Atomically replace path with the current metrics"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+@contextmanager
+def profiled(profiler, path):
+    """Profile the with-block with 'cprofile' (pstats file) or 'pyinstrument' (HTML report) into path.
+
+    Both profile the calling thread only; agent calls on worker threads show
+    up as time spent waiting on them.
+    """
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("pyinstrument profiling needs the pyinstrument package (pip install pyinstrument)")
+        session = Profiler()
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            Path(path).write_text(session.output_html())
+        return
+    
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        session.dump_stats(path)
+
+
+CHUNK_SIZE = 5000
+WORKING_FORMAT = '.parquet'
+
+RESPONSE_STATUSES = ['Interested', 'Not Interested', 'No Response']
+RESPONSE_DTYPE = pd.CategoricalDtype(RESPONSE_STATUSES)
+PRIORITY_DTYPE = pd.CategoricalDtype(['Low', 'Medium', 'High'], ordered=True)
+VERIFIED_LABELS = {True: 'Y', False: 'N'}
+VERIFIED_VALUES = {'y': True, 'yes': True, 'true': True, '1': True, 'n': False, 'no': False, 'false': False, '0': False}
+
+
+def parse_verified(column):
+    """'Email Verified' as a nullable boolean, reading Y/N, yes/no, true/false and 1/0 in any case.
+
+    Blank cells are pending; any other value raises ValueError rather than
+    being dropped, since a lost result would send the lead through
+    verification again.
+    """
+    flags = {}
+    unknown = []
+    for value in column.dropna().unique():
+        if isinstance(value, (bool, np.bool_)) or (isinstance(value, (int, float, np.number)) and value in (0, 1)):
+            flags[value] = bool(value)
+            continue
+        text = str(value).strip().lower()
+        if text in VERIFIED_VALUES:
+            flags[value] = VERIFIED_VALUES[text]
+        elif text:
+            unknown.append(value)
+    if unknown:
+        raise ValueError(f"Unrecognized 'Email Verified' values: {', '.join(map(repr, unknown[:5]))}")
+    return column.map(flags).astype('boolean')
+
+
+def parse_labels(column, dtype):
+    """column as the categorical dtype, matching its labels case-insensitively.
+
+    Labels outside the vocabulary are kept as extra categories after the
+    known ones instead of becoming missing values.
+    """
+    spellings = {str(label).lower(): label for label in dtype.categories}
+    values = column.astype(object)
+    labels = {}
+    for value in values.dropna().unique():
+        text = str(value).strip()
+        if text:
+            labels[value] = spellings.get(text.lower(), text)
+    extra = [label for label in dict.fromkeys(labels.values()) if label not in dtype.categories]
+    if extra:
+        dtype = pd.CategoricalDtype([*dtype.categories, *extra], ordered=dtype.ordered)
+    return values.map(labels).astype(dtype)
+
+
+def add_labels(df, column, labels):
+    """Append any of labels missing from the categorical column's categories, as parse_labels does"""
+    categories = df[column].cat.categories
+    extra = [label for label in dict.fromkeys(labels) if label not in categories and pd.notna(label)]
+    if extra:
+        df[column] = df[column].cat.add_categories(extra)
+    return df[column].dtype
+
+
+def to_typed_leads(df):
+    """Convert a leads table as read from a file to the compact in-memory schema.
+
+    'Email Verified' becomes a nullable boolean, the label columns become
+    categoricals, the dates datetime64 and 'Lead Score' int8, with missing
+    values (rather than '') marking pending work. Columns are replaced in
+    place and df is returned; already typed frames pass through unchanged.
+    """
+    if 'Email Verified' not in df.columns:
+        df['Email Verified'] = None
+    df['Email Verified'] = parse_verified(df['Email Verified'])
+    
+    if 'Response Status' not in df.columns:
+        df['Response Status'] = None
+    df['Response Status'] = parse_labels(df['Response Status'], RESPONSE_DTYPE)
+    
+    if 'Priority' in df.columns:
+        df['Priority'] = parse_labels(df['Priority'], PRIORITY_DTYPE)
+    if 'Industry' in df.columns:
+        df['Industry'] = df['Industry'].astype('category')
+    
+    for column in ('Last Contact', 'Created Date'):
+        if column not in df.columns:
+            df[column] = None
+        df[column] = pd.to_datetime(df[column].replace('', None), errors='coerce').astype('datetime64[s]')
+    
+    if 'Notes' not in df.columns:
+        df['Notes'] = ''
+    df['Notes'] = df['Notes'].fillna('')
+    
+    if 'Lead Score' in df.columns:
+        scores = pd.to_numeric(df['Lead Score'], errors='coerce')
+        known = scores.dropna()
+        if known.between(-128, 127).all() and (known % 1 == 0).all():
+            scores = scores.astype('int8' if len(known) == len(scores) else 'Int8')
+        df['Lead Score'] = scores
+    return df
+
+
+def to_labelled_leads(df):
+    """Copy of a typed leads table with the 'Y'/'N' and '' labels used in exported files"""
+    out = df.copy()
+    out['Email Verified'] = df['Email Verified'].map(VERIFIED_LABELS).fillna('')
+    for column in ('Response Status', 'Priority', 'Industry'):
+        if column in out.columns:
+            out[column] = df[column].astype(object).where(df[column].notna(), '')
+    out['Last Contact'] = df['Last Contact'].dt.strftime('%Y-%m-%d %H:%M:%S').fillna('')
+    out['Created Date'] = df['Created Date'].dt.strftime('%Y-%m-%d').fillna('')
+    return out
+
+
+SAMPLE_COMPANIES = [
+    ('Tech Solutions Inc', 'Technology'),
+    ('HealthCare Plus', 'Healthcare'),
+    ('Manufacturing Pro', 'Manufacturing'),
+    ('Finance Corp', 'Finance'),
+    ('Retail Giants', 'Retail'),
+    ('Education First', 'Education'),
+    ('Green Energy Co', 'Energy'),
+    ('Food Services Ltd', 'Food Service'),
+    ('Marketing Masters', 'Marketing'),
+    ('Construction Hub', 'Construction')
+]
+FIRST_NAMES = ['John', 'Jane', 'Mike', 'Sarah', 'David', 'Emma', 'Alex', 'Lisa']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis']
+INVALID_EMAILS = [
+    "invalid.email",
+    "no@marks@here.com",
+    "spaces in@email.com",
+    "@nodomain.com",
+    ".invalid@email.com",
+    "missing_dot@domaincom",
+    "special#chars@email.com",
+    ""
+]
+
+
+def generate_synthetic_leads(size, invalid_ratio=0.4, seed=None):
+    """Generate size typed sample leads in vectorized passes.
+
+    Roughly invalid_ratio of the emails are drawn from INVALID_EMAILS; the
+    rest are first.last@company.com addresses.
+    """
+    rng = np.random.default_rng(seed)
+    company_names = np.array([company for company, _ in SAMPLE_COMPANIES])
+    industries = np.array([industry for _, industry in SAMPLE_COMPANIES])
+    domains = np.array([f"{company.lower().replace(' ', '')}.com" for company, _ in SAMPLE_COMPANIES])
+    
+    company = rng.integers(len(SAMPLE_COMPANIES), size=size)
+    first = pd.Series(np.array(FIRST_NAMES)[rng.integers(len(FIRST_NAMES), size=size)])
+    last = pd.Series(np.array(LAST_NAMES)[rng.integers(len(LAST_NAMES), size=size)])
+    
+    emails = first.str.lower() + '.' + last.str.lower() + '@' + domains[company]
+    invalid = rng.random(size) < invalid_ratio
+    emails[invalid] = np.array(INVALID_EMAILS)[rng.integers(len(INVALID_EMAILS), size=int(invalid.sum()))]
+    
+    def digits(low, high):
+        return pd.Series(rng.integers(low, high, size=size)).astype(str)
+    
+    df = pd.DataFrame({
+        'Lead Name': first + ' ' + last,
+        'Email': emails,
+        'Contact Number': '+1-' + digits(100, 1000) + '-' + digits(100, 1000) + '-' + digits(1000, 10000),
+        'Company': company_names[company],
+        'Industry': industries[company],
+        'Email Verified': None,
+        'Response Status': None,
+        'Notes': '',
+        'Priority': np.array(['High', 'Medium', 'Low'])[rng.integers(3, size=size)],
+        'Last Contact': None,
+        'Created Date': pd.Timestamp.now().normalize(),
+        'Lead Score': rng.integers(1, 101, size=size)
+    })
+    return to_typed_leads(df)
+
+
+class LeadStore:
+    """Storage backend for a leads table in one file format"""
+
+    suffix = None
+
+    def save(self, df, path):
+        raise NotImplementedError
+
+    def load(self, path):
+        raise NotImplementedError
+
+
+class ParquetLeadStore(LeadStore):
+    """Columnar working format; the typed schema (categoricals, booleans, dates) is stored as is"""
+
+    suffix = '.parquet'
+
+    def save(self, df, path):
+        df.to_parquet(path, index=False)
+
+    def load(self, path):
+        return to_typed_leads(pd.read_parquet(path))
+
+
+class CsvLeadStore(LeadStore):
+    suffix = '.csv'
+
+    def save(self, df, path):
+        to_labelled_leads(df).to_csv(path, index=False)
+
+    def load(self, path):
+        return to_typed_leads(pd.read_csv(path))
+
+
+class ExcelLeadStore(LeadStore):
+    suffix = '.xlsx'
+
+    def save(self, df, path):
+        to_labelled_leads(df).to_excel(path, index=False)
+
+    def load(self, path):
+        return to_typed_leads(pd.read_excel(path))
+
+
+LEAD_STORES = {store.suffix: store for store in (ParquetLeadStore(), CsvLeadStore(), ExcelLeadStore())}
+
+
+def get_lead_store(filename):
+    """Storage backend for filename, chosen by its extension (XLSX if unknown)"""
+    return LEAD_STORES.get(Path(filename).suffix.lower(), LEAD_STORES['.xlsx'])
+
+
+def save_leads(df, path):
+    get_lead_store(path).save(df, path)
+
+
+def read_leads(source, filename):
+    """Read a whole XLSX, CSV or Parquet leads file into a DataFrame"""
+    return get_lead_store(filename).load(source)
+
+
+def export_xlsx_bytes(df):
+    """Render a leads table as XLSX bytes for download"""
+    buffer = io.BytesIO()
+    to_labelled_leads(df).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def iter_lead_chunks(source, filename, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size leads without reading the whole file.
+
+    XLSX files are read with openpyxl in read-only mode, CSV with pandas'
+    chunked reader and Parquet by pyarrow record batch. Chunks are converted
+    to the typed lead schema, and row labels continue across chunks so they
+    stay unique for the whole file.
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix == '.csv':
+        for chunk in pd.read_csv(source, chunksize=chunk_size):
+            yield to_typed_leads(chunk)
+        return
+
+    if suffix == '.parquet':
+        import pyarrow.parquet as pq
+        start = 0
+        for record_batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            chunk = record_batch.to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield to_typed_leads(chunk)
+        return
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        start = 0
+        for batch in chunked(rows, chunk_size):
+            chunk = pd.DataFrame(batch, columns=header, index=pd.RangeIndex(start, start + len(batch)))
+            yield to_typed_leads(chunk)
+            start += len(batch)
+    finally:
+        workbook.close()
+
+
+def processed_filename(filename, suffix=None):
+    """Output name for a processed file; by default CSV stays CSV and everything else becomes XLSX"""
+    path = Path(filename)
+    if suffix is None:
+        suffix = '.csv' if path.suffix.lower() == '.csv' else '.xlsx'
+    return f"processed_{path.stem}{suffix}"
+
+
+class ChunkedLeadWriter:
+    """Append processed chunks to a CSV or write-only XLSX file as they complete"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.is_csv = self.path.lower().endswith('.csv')
+        self.chunks = 0
+        self.workbook = None
+
+    def __enter__(self):
+        if not self.is_csv:
+            import openpyxl
+            self.workbook = openpyxl.Workbook(write_only=True)
+            self.sheet = self.workbook.create_sheet()
+        return self
+
+    def write(self, chunk):
+        chunk = to_labelled_leads(chunk)
+        if self.is_csv:
+            chunk.to_csv(self.path, mode='a' if self.chunks else 'w', header=not self.chunks, index=False)
+        else:
+            if not self.chunks:
+                self.sheet.append(list(chunk.columns))
+            for row in chunk.itertuples(index=False, name=None):
+                self.sheet.append([None if pd.isna(value) else value for value in row])
+        self.chunks += 1
+
+    def __exit__(self, *exc_info):
+        if self.workbook is not None:
+            self.workbook.save(self.path)
+            self.workbook.close()
+
+
+BREAKDOWN_DIMENSIONS = ('Industry', 'Company')
+UNKNOWN_GROUP = 'Unknown'
+
+
+class CampaignAggregates:
+    """Running per-group campaign counts for the breakdown dimensions.
+
+    Every lead's group is factorized once into an integer code (leads
+    without a value, or frames without the column, count as UNKNOWN_GROUP),
+    so a batch of results updates the count tables with one np.add.at per
+    dimension. breakdown() frames are memoized and rebuilt only after the tables have
+    changed (tracked by version). Responses other than RESPONSE_STATUSES
+    are counted as 'Other Response'.
+    """
+
+    FIELDS = ('leads', 'verified', 'failed', 'interested', 'not_interested', 'no_response', 'other_response',
+              'high_priority', 'score_sum', 'score_count')
+    RESPONSE_FIELDS = {'Interested': 'interested', 'Not Interested': 'not_interested', 'No Response': 'no_response'}
+
+    def __init__(self, df, dimensions=BREAKDOWN_DIMENSIONS):
+        self.index = df.index
+        self.version = 0
+        self.memo = {}
+        self.codes = {}
+        self.groups = {}
+        self.tables = {}
+        
+        verified = df['Email Verified']
+        responses = df['Response Status']
+        values = np.column_stack([
+            np.ones(len(df)),
+            verified.fillna(False).to_numpy(dtype=bool),
+            (~verified).fillna(False).to_numpy(dtype=bool),
+            *[(responses == status).fillna(False).to_numpy(dtype=bool) for status in self.RESPONSE_FIELDS],
+            (responses.notna() & ~responses.isin(list(self.RESPONSE_FIELDS))).to_numpy(dtype=bool),
+            (df['Priority'] == 'High').fillna(False).to_numpy(dtype=bool),
+            df['Lead Score'].fillna(0).to_numpy(dtype=float),
+            df['Lead Score'].notna().to_numpy(dtype=bool)
+        ]).astype(float)
+        
+        for dimension in dimensions:
+            column = df[dimension] if dimension in df else pd.Series(None, index=df.index, dtype=object)
+            codes, groups = pd.factorize(column.astype(object).fillna(UNKNOWN_GROUP).astype(str))
+            groups = pd.Index(groups)
+            self.codes[dimension] = codes
+            self.groups[dimension] = groups
+            self.tables[dimension] = np.column_stack([
+                np.bincount(codes, weights=values[:, field], minlength=len(groups))
+                for field in range(len(self.FIELDS))
+            ])
+
+    def record(self, results, field_of):
+        """Count (idx, value) results under field_of(value) in every dimension"""
+        if not results:
+            return
+        fields = [self.FIELDS.index(field_of(value)) for _, value in results]
+        if self.index is not None:
+            rows = self.index.get_indexer([idx for idx, _ in results])
+            for dimension, codes in self.codes.items():
+                np.add.at(self.tables[dimension], (codes[rows], fields), 1)
+        self.version += 1
+
+    def record_verifications(self, results):
+        self.record(results, lambda is_valid: 'verified' if is_valid else 'failed')
+
+    def record_responses(self, results):
+        self.record(results, lambda response: self.RESPONSE_FIELDS.get(response, 'other_response'))
+
+    def merge(self, other):
+        """Fold another aggregate store into this one by group label and return self.
+
+        The merged store covers leads from different frames, so it no longer
+        maps rows to groups: rows() returns None and record() only bumps the
+        version.
+        """
+        for dimension, table in self.tables.items():
+            mine = pd.DataFrame(table, index=self.groups[dimension])
+            theirs = pd.DataFrame(other.tables[dimension], index=other.groups[dimension])
+            combined = mine.add(theirs, fill_value=0)
+            self.groups[dimension] = combined.index
+            self.tables[dimension] = combined.to_numpy()
+        self.index = None
+        self.codes = {}
+        self.version += 1
+        return self
+
+    def breakdown(self, dimension):
+        """Per-group counts, average score and rates for dimension, largest groups first"""
+        cached = self.memo.get(dimension)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        
+        counts = pd.DataFrame(self.tables[dimension], index=self.groups[dimension], columns=self.FIELDS)
+        counts = counts[counts['leads'] > 0]
+        leads = counts['leads']
+        frame = pd.DataFrame({
+            'Leads': leads.astype(int),
+            'Verified': counts['verified'].astype(int),
+            'Failed': counts['failed'].astype(int),
+            'Interested': counts['interested'].astype(int),
+            'Not Interested': counts['not_interested'].astype(int),
+            'No Response': counts['no_response'].astype(int),
+            'Other Response': counts['other_response'].astype(int),
+            'High Priority': counts['high_priority'].astype(int),
+            'Avg Lead Score': (counts['score_sum'] / counts['score_count']).round(1),
+            'Verification Rate': (counts['verified'] / leads * 100).round(1),
+            'Success Rate': (counts['interested'] / leads * 100).round(1)
+        })
+        frame.index.name = dimension
+        frame = frame.sort_values('Leads', ascending=False)
+        self.memo[dimension] = (self.version, frame)
+        return frame
+
+    def rows(self, dimension, group):
+        """Positions of the leads in group, or None once the store has been merged"""
+        if dimension not in self.codes:
+            return None
+        return np.flatnonzero(self.codes[dimension] == self.groups[dimension].get_loc(group))
+
+
+class SupervisorAgent:
+    """Track which leads still need verification or outreach.
+
+    The frame is scanned once on creation; afterwards agents report their
+    results through record_verifications/record_responses and the pending
+    sets and status counters are updated in O(1) per lead.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.rescan()
+
+    def rescan(self):
+        """Rebuild the task state from a full scan of the frame"""
+        self.total_leads = len(self.df)
+        verified = self.df['Email Verified']
+        responses = self.df['Response Status']
+        
+        self.pending_verification = set(self.df.index[verified.isna().to_numpy()])
+        self.pending_outreach = set(self.df.index[(verified.fillna(False) & responses.isna()).to_numpy()])
+        self.verification_counts = Counter({
+            'Y': int(verified.sum()),
+            'N': int((~verified).sum())
+        })
+        self.response_counts = Counter(responses.value_counts().to_dict())
+        self.high_priority_leads = int((self.df['Priority'] == 'High').sum())
+        self.lead_score_sum = float(self.df['Lead Score'].sum())
+        self.lead_score_count = int(self.df['Lead Score'].count())
+        self.aggregates = CampaignAggregates(self.df)
+        
+    def monitor_leads(self):
+        
+        unverified = pd.Index(sorted(self.pending_verification))
+        unprocessed = pd.Index(sorted(self.pending_outreach))
+        
+        return unverified, unprocessed
+    
+    def assign_tasks(self):
+        unverified, unprocessed = self.monitor_leads()
+        return {
+            'verification_tasks': unverified.tolist(),
+            'outreach_tasks': unprocessed.tolist()
+        }
+
+    def record_verifications(self, results):
+        """Update state for (idx, is_valid) results written to 'Email Verified'"""
+        accepted = []
+        for idx, is_valid in results:
+            if idx not in self.pending_verification:
+                continue
+            self.pending_verification.discard(idx)
+            self.verification_counts['Y' if is_valid else 'N'] += 1
+            if is_valid:
+                self.pending_outreach.add(idx)
+            accepted.append((idx, is_valid))
+        self.aggregates.record_verifications(accepted)
+
+    def record_responses(self, results):
+        """Update state for (idx, response) results written to 'Response Status'"""
+        accepted = []
+        for idx, response in results:
+            if idx not in self.pending_outreach:
+                continue
+            self.pending_outreach.discard(idx)
+            self.response_counts[response] += 1
+            accepted.append((idx, response))
+        self.aggregates.record_responses(accepted)
+
+    def merge(self, other):
+        """Fold another supervisor's state into this one (e.g. for a later chunk) and return self"""
+        self.total_leads += other.total_leads
+        self.pending_verification |= other.pending_verification
+        self.pending_outreach |= other.pending_outreach
+        self.verification_counts.update(other.verification_counts)
+        self.response_counts.update(other.response_counts)
+        self.high_priority_leads += other.high_priority_leads
+        self.lead_score_sum += other.lead_score_sum
+        self.lead_score_count += other.lead_score_count
+        self.aggregates.merge(other.aggregates)
+        return self
+
+    def stats(self):
+        """Current task and status counts without touching the frame"""
+        return {
+            'total_leads': self.total_leads,
+            'pending_verification': len(self.pending_verification),
+            'pending_outreach': len(self.pending_outreach),
+            'verified': self.verification_counts['Y'],
+            'failed': self.verification_counts['N'],
+            'responses': self.response_counts,
+            'high_priority_leads': self.high_priority_leads
+        }
+    
+    def breakdown(self, dimension):
+        """Memoized per-group summary table for one of BREAKDOWN_DIMENSIONS"""
+        return self.aggregates.breakdown(dimension)
+
+    def group_leads(self, dimension, group):
+        """The leads of one breakdown group"""
+        rows = self.aggregates.rows(dimension, group)
+        if rows is None:
+            if dimension not in self.df:
+                return self.df
+            return self.df[(self.df[dimension].astype('string').fillna(UNKNOWN_GROUP) == group).to_numpy()]
+        return self.df.iloc[rows]
+    
+    def generate_summary(self):
+        total_leads = self.total_leads
+        verified_leads = self.verification_counts['Y']
+        interested = self.response_counts['Interested']
+        not_interested = self.response_counts['Not Interested']
+        no_response = self.response_counts['No Response']
+        
+        avg_lead_score = self.lead_score_sum / self.lead_score_count if self.lead_score_count else float('nan')
+        high_priority_leads = self.high_priority_leads
+        
+        return {
+            'total_leads': total_leads,
+            'verified_leads': verified_leads,
+            'interested': interested,
+            'not_interested': not_interested,
+            'no_response': no_response,
+            'verification_rate': f"{(verified_leads/total_leads*100):.1f}%" if total_leads > 0 else "0%",
+            'success_rate': f"{(interested/total_leads*100):.1f}%" if total_leads > 0 else "0%",
+            'avg_lead_score': f"{avg_lead_score:.1f}",
+            'high_priority_leads': high_priority_leads
+        }
+
+
+class TaskScheduler:
+    """Priority queue of lead rows for the agents to pull work from.
+
+    Rows are ordered by priority_weight * Priority rank (Low=0, Medium=1,
+    High=2, any other label 0) + score_weight * Lead Score, highest first
+    and in frame order on ties. The keys are computed in one vectorized pass and heapified, so
+    building the queue is O(n) and each pull is O(log n).
+    """
+
+    def __init__(self, leads_df, rows, priority_weight=100.0, score_weight=1.0):
+        rows = list(rows)
+        positions = leads_df.index.get_indexer(rows)
+        weight = np.zeros(len(rows))
+        if 'Priority' in leads_df.columns:
+            ranks = leads_df['Priority'].astype(PRIORITY_DTYPE).cat.codes.to_numpy().clip(0)
+            weight += priority_weight * ranks[positions]
+        if 'Lead Score' in leads_df.columns:
+            scores = pd.to_numeric(leads_df['Lead Score'], errors='coerce').fillna(0).to_numpy(dtype=float)
+            weight += score_weight * scores[positions]
+        self.heap = list(zip((-weight).tolist(), positions.tolist(), rows))
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def pop(self):
+        """Highest-priority row still queued"""
+        return heapq.heappop(self.heap)[2]
+
+    def __iter__(self):
+        while self.heap:
+            yield self.pop()
+
+
+# Only rejects what can never be delivered: the local part may use any RFC
+# 5322 atext character (or a non-ASCII letter) and the domain may be an IDN,
+# anything borderline is left to AgentA
+EMAIL_PATTERN = re.compile(
+    r"[\w!#$%&'*+/=?^`{|}~-]+(?:\.[\w!#$%&'*+/=?^`{|}~-]+)*"
+    r"@(?:[^\W_](?:[\w-]*[^\W_])?\.)+(?:[^\W\d_]{2,}|xn--[A-Za-z0-9-]+)"
+)
+# Emails are matched as Python strings: pyarrow's regex engine, which
+# pandas uses for the default string dtype, only treats ASCII as \w
+EMAIL_STRINGS = pd.StringDtype('python')
+
+
+def prevalidate_emails(df):
+    """Mark pending leads with syntactically invalid emails as unverified in one vectorized pass.
+
+    Returns the index of the rejected rows, so only plausible addresses are
+    left for AgentA.
+    """
+    pending = df['Email Verified'].isna()
+    emails = df.loc[pending, 'Email'].astype(EMAIL_STRINGS).str.strip()
+    plausible = emails.str.fullmatch(EMAIL_PATTERN).fillna(False).astype(bool)
+    rejected = plausible.index[~plausible.to_numpy()]
+    if len(rejected):
+        df.loc[rejected, 'Email Verified'] = False
+    return rejected
+
+
+DOMAIN_CACHE_SIZE = 4096
+
+
+def email_domain(email):
+    """Normalized domain part of an email address"""
+    return normalize_email(email).rpartition('@')[2]
+
+
+class AgentA:
+    @staticmethod
+    @lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+    def check_domain(domain):
+        """Simulate the domain-wide MX and catch-all checks, memoized per domain.
+
+        Returns 'ok', 'no_mx' (nothing can be delivered) or 'catch_all'
+        (every mailbox is accepted, so a per-mailbox probe tells us nothing).
+        """
+        time.sleep(0.5)
+        return np.random.choice(['ok', 'no_mx', 'catch_all'], p=[0.85, 0.05, 0.10])
+
+    @staticmethod
+    def check_mailbox(email):
+        """Simulate the per-mailbox probe"""
+        time.sleep(0.5)
+        return random.choice([True, True, True, False])
+
+    @staticmethod
+    def verify_email(email):
+        """Simulate email verification with realistic checks"""
+        if not isinstance(email, str) or not EMAIL_PATTERN.fullmatch(email.strip()):
+            return False
+        verdict = AgentA.check_domain(email_domain(email))
+        if verdict != 'ok':
+            return verdict == 'catch_all'
+        return AgentA.check_mailbox(email)
+
+
+class AgentB:
+    @staticmethod
+    def send_campaign_email(lead_info):
+        """Simulate sending campaign email"""
+        time.sleep(1)  
+        response_weights = [0.2, 0.3, 0.5]  
+        return np.random.choice(
+            ['Interested', 'Not Interested', 'No Response'],
+            p=response_weights
+        )
+
+
+class SimulatedVerifier(VerificationBackend):
+    """AgentA's simulated checks behind the backend interface"""
+
+    check_domain = staticmethod(AgentA.check_domain)
+
+    def check_mailboxes(self, emails):
+        return [AgentA.check_mailbox(email) for email in emails]
+
+
+class SimulatedSender(SendBackend):
+    """AgentB's simulated campaign behind the backend interface"""
+
+    def send_many(self, leads, progress=None):
+        return send_each(AgentB.send_campaign_email, leads, progress)
+
+
+def get_verification_backend(spec='simulated', pool_size=8, timeout=10.0):
+    """VerificationBackend for a spec string (see backends.py); 'simulated' is AgentA"""
+    if spec == 'simulated':
+        return SimulatedVerifier()
+    return verification_backend(spec, pool_size=pool_size, timeout=timeout)
+
+
+def get_send_backend(spec='simulated', pool_size=8, timeout=60.0):
+    """SendBackend for a spec string (see backends.py); 'simulated' is AgentB"""
+    if spec == 'simulated':
+        return SimulatedSender()
+    return send_backend(spec, pool_size=pool_size, timeout=timeout)
+
+
+class CallClock:
+    """When a run_bounded call started (None while queued or inside untimed()) and whether it was given up on"""
+
+    def __init__(self):
+        self.started = None
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.abandoned:
+                raise TimeoutError("call was abandoned after timing out")
+            self.started = time.monotonic()
+
+    def pause(self):
+        with self.lock:
+            self.started = None
+
+    def expire(self, now, timeout):
+        """Give up on the call if it has been running for more than timeout seconds"""
+        with self.lock:
+            if self.started is not None and now - self.started > timeout:
+                self.abandoned = True
+            return self.abandoned
+
+
+_worker = threading.local()
+
+
+@contextmanager
+def untimed():
+    """Stop the current run_bounded call's timeout clock for the duration of the block.
+
+    Meant for waits the pipeline imposes itself, such as rate-limit tokens
+    and retry backoff. If the call timed out before the block, TimeoutError
+    is raised on leaving it, so the abandoned worker does no further work.
+    """
+    clock = getattr(_worker, 'clock', None)
+    if clock is None:
+        yield
+        return
+    clock.pause()
+    yield
+    clock.start()
+
+
+def run_bounded(func, tasks, max_workers=16, timeout=None, batch_size=25):
+    """Run func over (key, payload) tasks on a bounded thread pool.
+
+    At most max_workers calls are in flight, so tasks may be a lazy iterable
+    of any length. Results are yielded as lists of (key, result) once
+    batch_size of them have completed. A call that raises, or runs longer
+    than timeout seconds, yields None for its key; time spent in untimed()
+    does not count. A timed out call cannot be
+    interrupted: its thread is left to finish on its own and the remaining
+    calls move to a fresh pool, so a hung call never holds up the rest.
+    Backends should still enforce their own socket timeouts, since every
+    hung call keeps its thread alive until it returns.
+    """
+    tasks = iter(tasks)
+    in_flight = {}
+    batch = []
+    poll = min(timeout, 0.5) if timeout else None
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def call(clock, payload):
+        _worker.clock = clock
+        try:
+            clock.start()
+            return func(payload)
+        finally:
+            _worker.clock = None
+
+    def submit(key, payload):
+        clock = CallClock()
+        in_flight[executor.submit(call, clock, payload)] = (key, payload, clock)
+
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_workers:
+                try:
+                    key, payload = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                submit(key, payload)
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, _, _ = in_flight.pop(future)
+                try:
+                    batch.append((key, future.result()))
+                except Exception:
+                    batch.append((key, None))
+
+            if timeout:
+                now = time.monotonic()
+                expired = [
+                    future for future, (_, _, clock) in in_flight.items() if clock.expire(now, timeout)
+                ]
+                for future in expired:
+                    key, _, _ = in_flight.pop(future)
+                    batch.append((key, None))
+                if expired:
+                    # The hung threads stay with the old pool, which lets its
+                    # other threads exit once they are idle; calls still
+                    # queued behind them are moved to a fresh pool
+                    executor.shutdown(wait=False)
+                    executor = ThreadPoolExecutor(max_workers=max_workers)
+                    for future, (key, payload, _) in list(in_flight.items()):
+                        if future.cancel():
+                            del in_flight[future]
+                            submit(key, payload)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+VERIFICATION_CACHE_PATH = '.verification_cache.sqlite3'
+
+
+def normalize_email(email):
+    """Canonical cache key for an email address"""
+    return str(email).strip().lower()
+
+
+class VerificationCache:
+    """SQLite-backed cache of verification results keyed by backend spec and normalized email.
+
+    Each backend only sees its own results, so e.g. random fake:// verdicts
+    are never served to a run against a real verifier. Entries expire ttl seconds after they were verified, and once more than
+    max_entries are stored the least recently used ones are evicted.
+    """
+
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, path=VERIFICATION_CACHE_PATH, ttl=7 * 24 * 3600, max_entries=100_000, backend='simulated'):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.conn:
+            # Results cached before entries recorded their backend can't be trusted
+            self.conn.execute("DROP TABLE IF EXISTS verification_cache")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS verification_results ("
+                "backend TEXT NOT NULL, email TEXT NOT NULL, valid INTEGER NOT NULL, "
+                "verified_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (backend, email))"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS verification_results_last_used "
+                "ON verification_results (last_used)"
+            )
+
+    def get_many(self, emails):
+        """Return {normalized email: bool} for the fresh entries among emails"""
+        keys = list(dict.fromkeys(normalize_email(email) for email in emails))
+        now = time.time()
+        found = {}
+        with self.lock, self.conn:
+            for start in range(0, len(keys), self.LOOKUP_CHUNK):
+                chunk = keys[start:start + self.LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT email, valid FROM verification_results "
+                    f"WHERE backend = ? AND verified_at >= ? AND email IN ({placeholders})",
+                    [self.backend, now - self.ttl, *chunk]
+                ).fetchall()
+                found.update((email, bool(valid)) for email, valid in rows)
+            if found:
+                self.conn.executemany(
+                    "UPDATE verification_results SET last_used = ? WHERE backend = ? AND email = ?",
+                    [(now, self.backend, email) for email in found]
+                )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, email):
+        """Return the cached result for email, or None on a miss"""
+        return self.get_many([email]).get(normalize_email(email))
+
+    def put_many(self, results):
+        """Store (email, is_valid) pairs and evict anything over the limits"""
+        now = time.time()
+        rows = [(self.backend, normalize_email(email), int(bool(valid)), now, now) for email, valid in results]
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO verification_results VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute(
+                "DELETE FROM verification_results WHERE verified_at < ?", (now - self.ttl,)
+            )
+            excess = self.conn.execute("SELECT COUNT(*) FROM verification_results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM verification_results WHERE rowid IN ("
+                    "SELECT rowid FROM verification_results ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+
+    def put(self, email, is_valid):
+        self.put_many([(email, is_valid)])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items from iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_bulk(func, tasks, bulk_size=1, max_workers=16, timeout=None, batch_size=25, progress=False):
+    """run_bounded over groups of up to bulk_size (key, payload) tasks.
+
+    func gets a list of payloads and returns one result per payload.
+    timeout is per task, so each call gets bulk_size * timeout. Results
+    are still yielded per key, in batches of about batch_size; a group
+    whose call fails or times out yields None for each of its keys. With
+    progress=True func is called as func(payloads, progress) with a
+    BulkProgress, and a failed or timed out group keeps the results it
+    had already reported there.
+    """
+    def groups():
+        for group in chunked(tasks, bulk_size):
+            done = BulkProgress()
+            yield ([key for key, _ in group], done), ([payload for _, payload in group], done)
+
+    def call(group):
+        payloads, done = group
+        return func(payloads, done) if progress else func(payloads)
+
+    for batch in run_bounded(call, groups(), max_workers=max_workers,
+                             timeout=timeout * bulk_size if timeout else None,
+                             batch_size=max(1, batch_size // bulk_size)):
+        results = []
+        for (keys, done), values in batch:
+            if values is None or len(values) != len(keys):
+                done.stopped = True
+                values = list(done[:len(keys)]) + [None] * (len(keys) - len(done))
+            results.extend(zip(keys, values))
+        yield results
+
+
+class VerificationEngine:
+    """Verify many emails concurrently through AgentA or a VerificationBackend.
+
+    Pending emails are taken in chunks: cached results are returned
+    straight away, the distinct domains of the rest are checked once each,
+    and only addresses on deliverable, non catch-all domains get a
+    per-mailbox check on the worker pool. With bulk_size > 1 each worker
+    call checks that many mailboxes through bulk_verifier.
+    """
+
+    CHUNK_SIZE = 500
+
+    def __init__(self, verifier=None, domain_checker=None, max_workers=16, timeout=10.0,
+                 batch_size=25, cache=None, bulk_verifier=None, bulk_size=1):
+        if verifier is None and bulk_verifier is None:
+            verifier = AgentA.check_mailbox
+            domain_checker = domain_checker or AgentA.check_domain
+        self.verifier = verifier
+        self.bulk_verifier = bulk_verifier or self.verify_each
+        self.bulk_size = bulk_size
+        self.domain_checker = domain_checker
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.cache = cache
+        self.domain_lookups = 0
+
+    def verify_each(self, emails):
+        return [self.verifier(email) for email in emails]
+
+    def check_domains(self, domains):
+        """Return {domain: verdict} for the distinct domains, None where the check timed out"""
+        domains = set(domains)
+        self.domain_lookups += len(domains)
+        verdicts = {}
+        for batch in run_bounded(
+            self.domain_checker, ((domain, domain) for domain in domains),
+            max_workers=self.max_workers,
+            timeout=self.timeout,
+            batch_size=len(domains)
+        ):
+            verdicts.update(batch)
+        return verdicts
+
+    def run(self, tasks):
+        """Yield batches of (idx, True/False/None) for (idx, email) tasks; None means timed out"""
+        settled = []
+
+        def mailbox_tasks():
+            for chunk in chunked(tasks, self.CHUNK_SIZE):
+                if self.cache is not None:
+                    cached = self.cache.get_many(email for _, email in chunk)
+                    remaining = []
+                    for idx, email in chunk:
+                        key = normalize_email(email)
+                        if key in cached:
+                            settled.append(((idx, None), cached[key]))
+                        else:
+                            remaining.append((idx, email))
+                    chunk = remaining
+                if self.domain_checker is None or not chunk:
+                    for idx, email in chunk:
+                        yield (idx, email), email
+                    continue
+
+                verdicts = self.check_domains(email_domain(email) for _, email in chunk)
+                for idx, email in chunk:
+                    verdict = verdicts.get(email_domain(email))
+                    if verdict == 'ok':
+                        yield (idx, email), email
+                    else:
+                        settled.append(((idx, email), None if verdict is None else verdict == 'catch_all'))
+
+        for batch in run_bulk(
+            self.bulk_verifier, mailbox_tasks(),
+            bulk_size=self.bulk_size,
+            max_workers=self.max_workers,
+            timeout=self.timeout,
+            batch_size=self.batch_size
+        ):
+            batch = settled + batch
+            settled.clear()
+            yield self.settle(batch)
+        if settled:
+            yield self.settle(settled)
+
+    def settle(self, batch):
+        """Store fresh results in the cache and strip the emails from the batch keys"""
+        if self.cache is not None:
+            self.cache.put_many(
+                (email, is_valid) for (_, email), is_valid in batch
+                if email is not None and is_valid is not None
+            )
+        return [(idx, is_valid) for (idx, _), is_valid in batch]
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing rate calls per second with bursts up to capacity"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class OutreachDispatcher:
+    """Send campaign emails concurrently through AgentB or a SendBackend under a provider rate limit.
+
+    With bulk_size > 1 each worker call sends that many emails through
+    bulk_sender, e.g. over one SMTP session; timeout is per email. bulk_sender
+    takes (leads, progress) like SendBackend.send_many, so emails already
+    sent when a call times out or fails are still reported.
+    """
+
+    def __init__(self, sender=None, max_workers=16, rate_limit=20.0, max_retries=3,
+                 backoff=0.5, timeout=60.0, batch_size=25, bulk_sender=None, bulk_size=1):
+        self.sender = sender or AgentB.send_campaign_email
+        self.bulk_sender = bulk_sender or self.send_each
+        self.bulk_size = bulk_size
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.batch_size = batch_size
+
+    def send_each(self, leads, progress=None):
+        return send_each(self.sender, leads, progress)
+
+    def send(self, leads, progress):
+        """Send a group of emails, retrying failures with exponential backoff and jitter.
+
+        A group that fails after some of its emails went out is not retried,
+        so nobody is emailed twice.
+        """
+        for attempt in range(self.max_retries + 1):
+            # Waiting for tokens or backing off is not the provider hanging,
+            # so it does not count against the timeout
+            with untimed():
+                if attempt:
+                    time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+                if self.bucket:
+                    for _ in leads:
+                        self.bucket.acquire()
+            try:
+                return self.bulk_sender(leads, progress)
+            except Exception:
+                if progress or attempt == self.max_retries:
+                    raise
+
+    def run(self, tasks):
+        """Yield batches of (idx, response) for (idx, lead) tasks; None means the send failed"""
+        yield from run_bulk(
+            self.send, tasks,
+            bulk_size=self.bulk_size,
+            max_workers=self.max_workers,
+            timeout=self.timeout,
+            batch_size=self.batch_size,
+            progress=True
+        )
+
+
+class RefreshScheduler:
+    """Throttle workflow redraws to one every interval_ms or every_leads processed leads"""
+
+    def __init__(self, interval_ms=500, every_leads=50):
+        self.interval = interval_ms / 1000
+        self.every_leads = every_leads
+        self.last_refresh = time.monotonic()
+        self.processed = 0
+        self.changed = {}
+
+    def record(self, changed_idx, processed=None):
+        """Note rows written since the last redraw and how many leads were processed"""
+        self.changed.update(dict.fromkeys(changed_idx))
+        self.processed += len(changed_idx) if processed is None else processed
+
+    def due(self):
+        return (
+            self.processed >= self.every_leads
+            or time.monotonic() - self.last_refresh >= self.interval
+        )
+
+    def take_changed(self):
+        """Return rows changed since the last redraw and start a new interval"""
+        changed = list(self.changed)
+        self.changed = {}
+        self.processed = 0
+        self.last_refresh = time.monotonic()
+        return changed
+
+
+def normalize_phones(numbers, country_code='1'):
+    """Vectorized E.164 normalization of a Series of phone numbers; NA where no number can be made out.
+
+    Numbers written with '+' or '00' keep their country code; ten-digit
+    national numbers get country_code.
+    """
+    raw = numbers.astype('string').str.strip().fillna('')
+    digits = raw.str.replace(r'\D', '', regex=True)
+    digits = digits.where(~raw.str.startswith('00'), digits.str[2:])
+    international = raw.str.startswith('+') | raw.str.startswith('00')
+    national = ~international & (digits.str.len() == 10)
+    phones = ('+' + digits).where(~national, '+' + country_code + digits)
+    return phones.where(digits.str.len().between(8, 15))
+
+
+class IdentityIndex:
+    """Groups rows of a leads table that refer to the same person.
+
+    Rows with a well-formed email are linked only when their normalized
+    emails match, since people at one company often share a switchboard
+    number. A row without a usable email is linked by its E.164 phone
+    number: to the lead that owns that number when exactly one email is
+    seen with it, else to other such rows with the same number. Each group
+    is represented by its first row (preferring one with a well-formed
+    email); only canonical rows are sent to the agents and expand() fans
+    their results back out to the duplicates.
+    """
+
+    def __init__(self, leads_df):
+        n = len(leads_df)
+        order = pd.Series(np.arange(n))
+        emails = leads_df['Email'].astype(EMAIL_STRINGS).str.strip().str.lower().reset_index(drop=True)
+        plausible = emails.str.fullmatch(EMAIL_PATTERN).fillna(False).to_numpy(dtype=bool)
+        rank = order.groupby(emails.where(plausible).to_numpy(), dropna=True).transform('min')
+        rank = rank.reindex(order.index).fillna(order).astype(np.int64)
+        
+        if 'Contact Number' in leads_df.columns:
+            phones = normalize_phones(leads_df['Contact Number']).reset_index(drop=True)
+            known = plausible & phones.notna().to_numpy()
+            owners = pd.DataFrame({'phone': phones[known], 'email': emails[known], 'rank': rank[known]})
+            owners = owners.groupby('phone').agg(emails=('email', 'nunique'), rank=('rank', 'min'))
+            orphans = ~plausible & phones.notna().to_numpy()
+            unowned = orphans & ~phones.isin(owners.index).to_numpy()
+            linked = phones[orphans].map(owners.loc[owners['emails'] == 1, 'rank'])
+            linked = linked.fillna(order[unowned].groupby(phones[unowned]).transform('min'))
+            rank[orphans] = linked.fillna(order[orphans]).astype(np.int64)
+        
+        positions = rank.to_numpy()
+        self.canonical = pd.Series(leads_df.index[positions], index=leads_df.index)
+        is_duplicate = (positions != np.arange(n))
+        duplicates = self.canonical[is_duplicate]
+        self.duplicates = {
+            canonical: rows.index.tolist() for canonical, rows in duplicates.groupby(duplicates, sort=False)
+        }
+        self.duplicate_rows = set(duplicates.index)
+        self.emails = leads_df.loc[duplicates.index, 'Email'].to_dict()
+        self.shared = []
+
+    def share_results(self, leads_df):
+        """Copy results already recorded for one row of a group to the group's rows that lack them.
+
+        Only canonical rows reach the agents, so a duplicate whose canonical
+        row finished in an earlier run would otherwise stay pending for
+        good. Returns the rows filled in.
+        """
+        group = pd.Series(self.canonical.to_numpy(), index=leads_df.index)
+        filled = []
+        for columns in (['Email Verified'], ['Response Status', 'Last Contact']):
+            done = leads_df[columns[0]].notna().to_numpy()
+            sources = pd.Series(leads_df.index[done], index=group[done].to_numpy())
+            sources = sources[~sources.index.duplicated()]
+            targets = ~done & group.isin(sources.index).to_numpy()
+            if not targets.any():
+                continue
+            rows = leads_df.index[targets]
+            source_rows = sources.loc[group[targets].to_numpy()].to_numpy()
+            for column in columns:
+                leads_df.loc[rows, column] = leads_df.loc[source_rows, column].to_numpy()
+            filled.extend(rows)
+        self.shared = list(dict.fromkeys(filled))
+        return self.shared
+
+    def __len__(self):
+        return len(self.duplicate_rows)
+
+    def canonical_only(self, rows):
+        """Drop duplicate rows from a task list"""
+        return [idx for idx in rows if idx not in self.duplicate_rows]
+
+    def expand(self, results, pending):
+        """Add (duplicate, value) for every duplicate of a result's row that is still in pending"""
+        expanded = list(results)
+        for idx, value in results:
+            expanded.extend((duplicate, value) for duplicate in self.duplicates.get(idx, ()) if duplicate in pending)
+        return expanded
+
+
+CHECKPOINT_DIR = '.checkpoints'
+
+
+def _json_key(idx):
+    """Row label as a JSON-serializable value"""
+    return idx.item() if hasattr(idx, 'item') else idx
+
+
+class WorkflowJournal:
+    """Append-only JSON-lines journal of per-lead results, used to resume interrupted runs.
+
+    Each batch of results is appended and fsynced as soon as it completes,
+    before it reaches the frame. Entries record the row label together with the lead's
+    email, so a replay only restores rows that still hold the same lead.
+    """
+
+    def __init__(self, source_name, directory=CHECKPOINT_DIR):
+        self.path = Path(directory) / f"{Path(source_name).name}.journal.jsonl"
+        self.entries = None
+        self.latest = None
+
+    def exists(self):
+        return self.path.exists()
+
+    def append(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as journal:
+            for entry in entries:
+                journal.write(json.dumps(entry) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def record_verifications(self, results, emails):
+        """Journal (idx, is_valid) results; emails maps each row to its lead's email"""
+        self.append(
+            {'kind': 'verify', 'row': _json_key(idx), 'email': str(emails[idx]), 'valid': bool(is_valid)}
+            for idx, is_valid in results
+        )
+
+    def record_responses(self, results, emails, contacted_at):
+        """Journal (idx, response) results; emails maps each row to its lead's email"""
+        contacted_at = contacted_at.isoformat()
+        self.append(
+            {'kind': 'outreach', 'row': _json_key(idx), 'email': str(emails[idx]),
+             'response': str(response), 'contacted_at': contacted_at}
+            for idx, response in results
+        )
+
+    def load(self):
+        """Read the journal once; a torn last line from a crash is ignored"""
+        if self.entries is None:
+            self.entries = []
+            if self.exists():
+                with open(self.path, encoding='utf-8') as journal:
+                    for line in journal:
+                        try:
+                            self.entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            break
+        return self.entries
+
+    def results(self):
+        """Last journaled verification and response per (row, email), as frames indexed by row label"""
+        if self.latest is None:
+            entries = pd.DataFrame(self.load(), columns=['kind', 'row', 'email', 'valid', 'response', 'contacted_at'])
+            entries = entries.drop_duplicates(['kind', 'row', 'email'], keep='last').set_index('row')
+            self.latest = (entries[entries['kind'] == 'verify'], entries[entries['kind'] == 'outreach'])
+        return self.latest
+
+    def replay(self, leads_df):
+        """Apply journaled results to the matching rows of leads_df; returns the number of rows restored"""
+        verified, responses = (self.matching(entries, leads_df) for entries in self.results())
+        if len(verified):
+            leads_df.loc[verified.index, 'Email Verified'] = verified['valid'].astype(bool).to_numpy()
+        if len(responses):
+            add_labels(leads_df, 'Response Status', responses['response'])
+            leads_df.loc[responses.index, 'Response Status'] = responses['response'].to_numpy()
+            leads_df.loc[responses.index, 'Last Contact'] = pd.to_datetime(responses['contacted_at']).to_numpy()
+        return len(verified.index.union(responses.index))
+
+    @staticmethod
+    def matching(entries, leads_df):
+        """The entries whose row is in leads_df and still holds the journaled email"""
+        entries = entries[entries.index.isin(leads_df.index)]
+        emails = leads_df['Email'].reindex(entries.index).astype(str).to_numpy()
+        return entries[emails == entries['email'].to_numpy()]
+
+    def discard(self):
+        self.entries = None
+        self.latest = None
+        if self.exists():
+            self.path.unlink()
+
+
+class ResultBuffer:
+    """Agent results for leads_df held in arrays by row position and written back in bulk.
+
+    add_verifications/add_responses only touch numpy arrays; flush() applies
+    everything buffered since the last flush with one positional assignment
+    per column, in place, so there is no per-cell pandas overhead and no
+    copy of the frame.
+    """
+
+    def __init__(self, leads_df):
+        self.df = leads_df
+        size = len(leads_df)
+        self.verified = np.zeros(size, dtype=bool)
+        self.responses = np.full(size, -1, dtype=np.int16)
+        self.response_dtype = leads_df['Response Status'].dtype
+        self.contacted_at = np.full(size, np.datetime64('NaT', 's'))
+        self.verified_rows = []
+        self.response_rows = []
+        self.pending = 0
+
+    def __len__(self):
+        return self.pending
+
+    def add_verifications(self, results):
+        rows = self.df.index.get_indexer([idx for idx, _ in results])
+        self.verified[rows] = [bool(is_valid) for _, is_valid in results]
+        self.verified_rows.append(rows)
+        self.pending += len(rows)
+
+    def add_responses(self, results, contacted_at):
+        rows = self.df.index.get_indexer([idx for idx, _ in results])
+        responses = [response for _, response in results]
+        self.response_dtype = add_labels(self.df, 'Response Status', responses)
+        self.responses[rows] = self.response_dtype.categories.get_indexer(responses)
+        self.contacted_at[rows] = np.datetime64(contacted_at, 's')
+        self.response_rows.append(rows)
+        self.pending += len(rows)
+
+    def flush(self):
+        """Write the buffered results to the frame; returns the index labels written"""
+        columns = self.df.columns
+        written = []
+        if self.verified_rows:
+            rows = np.concatenate(self.verified_rows)
+            self.df.iloc[rows, columns.get_loc('Email Verified')] = self.verified[rows]
+            written.append(rows)
+        if self.response_rows:
+            rows = np.concatenate(self.response_rows)
+            self.df.iloc[rows, columns.get_loc('Response Status')] = pd.Categorical.from_codes(
+                self.responses[rows], dtype=self.response_dtype
+            )
+            self.df.iloc[rows, columns.get_loc('Last Contact')] = self.contacted_at[rows]
+            written.append(rows)
+        self.verified_rows = []
+        self.response_rows = []
+        self.pending = 0
+        return self.df.index[np.concatenate(written)].tolist() if written else []
+
+
+def process_leads(leads_df, supervisor, logger, settings, on_batch=None, journal=None, identities=None,
+                  metrics=None):
+    """Pre-validate, verify and reach out to the pending leads in leads_df.
+
+    Results are written to leads_df, reported to the supervisor and, when a
+    journal is given, checkpointed as each batch completes. With an
+    IdentityIndex only canonical rows reach the agents and their results
+    are copied to the duplicate rows. Results are buffered and written to
+    leads_df every settings.flush_every leads and at the end of each stage;
+    on_batch(stage, completed, total, changed, processed) is called after
+    every batch so callers can report progress, with changed listing the
+    rows written since the last call. Stage timings, agent
+    latencies, queue depths and cache ratios go to metrics when given.
+    Returns False if there was nothing to do.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics()
+    with metrics.timer('prevalidate'):
+        rejected = prevalidate_emails(leads_df)
+    supervisor.record_verifications((idx, False) for idx in rejected)
+    if len(rejected):
+        logger.add_log('supervisor', f"Pre-validation rejected {len(rejected)} malformed emails", 'error')
+        if on_batch:
+            on_batch('verification', 0, len(rejected), list(rejected), len(rejected))
+    
+    initial_tasks = supervisor.assign_tasks()
+    verification_tasks = initial_tasks['verification_tasks']
+    if identities is not None:
+        verification_tasks = identities.canonical_only(verification_tasks)
+    
+    if len(verification_tasks) == 0 and len(initial_tasks['outreach_tasks']) == 0:
+        logger.add_log('supervisor', "No tasks to process", 'info')
+        return False
+    
+    logger.add_log('supervisor', f"Starting email verification for {len(verification_tasks)} leads", 'info')
+    completed_tasks = 0
+    total_verification_tasks = len(verification_tasks)
+    
+    cache = VerificationCache(backend=settings.verify_backend) if settings.use_verification_cache else None
+    verifier = get_verification_backend(settings.verify_backend, settings.verify_workers, settings.verify_timeout)
+    domain_cache = getattr(verifier.check_domain, 'cache_info', None)
+    domain_cache_before = domain_cache() if domain_cache else None
+    engine = VerificationEngine(
+        bulk_verifier=metrics.timed(verifier.check_mailboxes, 'agent_a_mailbox'),
+        domain_checker=metrics.timed(verifier.check_domain, 'agent_a_domain'),
+        max_workers=settings.verify_workers,
+        timeout=settings.verify_timeout,
+        cache=cache,
+        bulk_size=settings.bulk_size
+    )
+    results = ResultBuffer(leads_df)
+    
+    def flush(force=False):
+        if not results or not (force or len(results) >= settings.flush_every):
+            return []
+        with metrics.timer('write_back'):
+            return results.flush()
+    
+    task_rows = leads_df.loc[verification_tasks, ['Email', 'Lead Name']]
+    emails = task_rows['Email'].to_dict()
+    lead_names = task_rows['Lead Name'].to_dict()
+    journal_emails = emails if identities is None else ChainMap(emails, identities.emails)
+    queue = TaskScheduler(leads_df, verification_tasks, settings.priority_weight, settings.score_weight)
+    tasks = ((idx, emails[idx]) for idx in queue)
+    
+    for batch in metrics.timed_iter(engine.run(tasks), 'verification'):
+        metrics.set_gauge('queue_depth', len(queue), queue='verification')
+        finished = [(idx, is_valid) for idx, is_valid in batch if is_valid is not None]
+        if finished and identities is not None:
+            finished = identities.expand(finished, supervisor.pending_verification)
+        if finished:
+            results.add_verifications(finished)
+            supervisor.record_verifications(finished)
+            if journal is not None:
+                with metrics.timer('journal'):
+                    journal.record_verifications(finished, journal_emails)
+        
+        for idx, is_valid in batch:
+            lead_name = lead_names[idx]
+            if is_valid is None:
+                logger.add_log('agent_a', f"Email verification timed out for {lead_name}", 'error')
+            else:
+                status = 'success' if is_valid else 'error'
+                logger.add_log('agent_a', 
+                              f"Email verification {'successful' if is_valid else 'failed'} for {lead_name}", 
+                              status)
+        
+        completed_tasks += len(batch)
+        changed = flush(force=completed_tasks == total_verification_tasks)
+        if on_batch:
+            with metrics.timer('on_batch'):
+                on_batch('verification', completed_tasks, total_verification_tasks, changed, len(batch))
+    changed = flush(force=True)
+    if changed and on_batch:
+        on_batch('verification', completed_tasks, total_verification_tasks, changed, 0)
+    
+    if engine.domain_lookups:
+        logger.add_log('supervisor', 
+                      f"Resolved {engine.domain_lookups} domain checks for {total_verification_tasks} emails", 
+                      'info')
+    verifier.close()
+    if domain_cache:
+        domain_cache_after = domain_cache()
+        metrics.record_cache('domain', domain_cache_after.hits - domain_cache_before.hits,
+                             domain_cache_after.misses - domain_cache_before.misses)
+    if cache is not None:
+        stats = cache.stats()
+        metrics.record_cache('verification', stats['hits'], stats['misses'])
+        logger.add_log('supervisor', 
+                      f"Verification cache: {stats['hits']} hits, {stats['misses']} misses", 
+                      'info')
+        cache.close()
+    
+    updated_tasks = supervisor.assign_tasks()
+    outreach_tasks = updated_tasks['outreach_tasks']
+    if identities is not None:
+        outreach_tasks = identities.canonical_only(outreach_tasks)
+    
+    if outreach_tasks:
+        logger.add_log('supervisor', f"Starting email campaign for {len(outreach_tasks)} verified leads", 'info')
+        outreach_completed = 0
+        total_outreach = len(outreach_tasks)
+        
+        sender = get_send_backend(settings.send_backend, settings.send_workers)
+        dispatcher = OutreachDispatcher(
+            bulk_sender=metrics.timed(sender.send_many, 'agent_b_send'),
+            max_workers=settings.send_workers,
+            rate_limit=settings.send_rate_limit,
+            max_retries=settings.send_retries,
+            bulk_size=settings.bulk_size
+        )
+        leads = leads_df.loc[outreach_tasks].to_dict('index')
+        journal_emails = {idx: lead['Email'] for idx, lead in leads.items()}
+        if identities is not None:
+            journal_emails = ChainMap(journal_emails, identities.emails)
+        queue = TaskScheduler(leads_df, outreach_tasks, settings.priority_weight, settings.score_weight)
+        tasks = ((idx, leads[idx]) for idx in queue)
+        
+        for batch in metrics.timed_iter(dispatcher.run(tasks), 'outreach'):
+            metrics.set_gauge('queue_depth', len(queue), queue='outreach')
+            sent = [(idx, response) for idx, response in batch if response is not None]
+            if sent and identities is not None:
+                sent = identities.expand(sent, supervisor.pending_outreach)
+            if sent:
+                contacted_at = pd.Timestamp.now().floor('s')
+                results.add_responses(sent, contacted_at)
+                supervisor.record_responses(sent)
+                if journal is not None:
+                    with metrics.timer('journal'):
+                        journal.record_responses(sent, journal_emails, contacted_at)
+            
+            for idx, response in batch:
+                lead_name = leads[idx]['Lead Name']
+                if response is None:
+                    logger.add_log('agent_b', f"Campaign email to {lead_name} failed after retries", 'error')
+                else:
+                    status = 'success' if response == 'Interested' else 'info'
+                    logger.add_log('agent_b', 
+                                  f"Campaign email sent to {lead_name} - Response: {response}", 
+                                  status)
+            
+            outreach_completed += len(batch)
+            changed = flush(force=outreach_completed == total_outreach)
+            if on_batch:
+                with metrics.timer('on_batch'):
+                    on_batch('outreach', outreach_completed, total_outreach, changed, len(batch))
+        sender.close()
+        changed = flush(force=True)
+        if changed and on_batch:
+            on_batch('outreach', outreach_completed, total_outreach, changed, 0)
+    
+    return True
+
+
+def resume_from_journal(journal, leads_df, logger, resume=True):
+    """Restore checkpointed results into leads_df when resuming, else start a fresh journal"""
+    if not resume:
+        journal.discard()
+        return 0
+    restored = journal.replay(leads_df) if journal.exists() else 0
+    if restored:
+        logger.add_log('system', f"Resumed {restored} leads from checkpoint {journal.path}", 'success')
+    return restored
+
+
+def build_identity_index(leads_df, settings, logger, supervisor=None):
+    """IdentityIndex for leads_df when deduplication is enabled, else None.
+
+    Results already recorded for a lead are copied to its pending duplicate
+    rows, and supervisor is rescanned if any were.
+    """
+    if not settings.deduplicate:
+        return None
+    identities = IdentityIndex(leads_df)
+    if len(identities):
+        logger.add_log('supervisor', 
+                      f"Collapsed {len(identities)} duplicate rows into {len(identities.duplicates)} leads", 
+                      'info')
+    if identities.share_results(leads_df):
+        logger.add_log('supervisor', 
+                      f"Copied earlier results to {len(identities.shared)} duplicate rows", 
+                      'info')
+        if supervisor is not None:
+            supervisor.rescan()
+    return identities
+
+
+def run_workflow(leads_df, source_name, settings, logger, on_batch=None, supervisor=None, metrics=None):
+    """Run the whole verify→outreach workflow over an in-memory leads table.
+
+    Checkpointed results are resumed first, the processed table is saved as
+    a Parquet working file and the journal is removed. Stage timings
+    and agent latencies are recorded in metrics when given. Returns
+    (supervisor, output_filename); output_filename is None when there was
+    nothing to process.
+    """
+    to_typed_leads(leads_df)
+    if supervisor is None:
+        supervisor = SupervisorAgent(leads_df)
+    logger.add_log('system', f"Processing file: {source_name}", 'info')
+    
+    if metrics is None:
+        metrics = PipelineMetrics()
+    journal = WorkflowJournal(source_name)
+    with metrics.timer('resume'):
+        restored = resume_from_journal(journal, leads_df, logger, settings.resume_runs)
+        if restored:
+            supervisor.rescan()
+    
+    with metrics.timer('deduplicate'):
+        identities = build_identity_index(leads_df, settings, logger, supervisor)
+    processed = process_leads(leads_df, supervisor, logger, settings, on_batch, journal, identities, metrics)
+    if not processed and not restored and not (identities is not None and identities.shared):
+        return supervisor, None
+    
+    output_filename = processed_filename(source_name, WORKING_FORMAT)
+    with metrics.timer('save'):
+        save_leads(leads_df, output_filename)
+    journal.discard()
+    logger.add_log('system', f"Updated leads file saved as '{output_filename}'", 'success')
+    return supervisor, output_filename
+
+
+def stream_workflow(source, source_name, settings, logger, on_chunk=None, metrics=None):
+    """Run the workflow chunk by chunk over a file without loading it whole.
+
+    Each processed chunk is appended to the output file straight away and
+    on_chunk(campaign, leads_done, chunks) is called with the merged
+    supervisor. Returns (campaign, output_filename); campaign is None for
+    an empty file.
+    """
+    logger.add_log('system', f"Streaming file: {source_name}", 'info')
+    output_filename = processed_filename(source_name)
+    campaign = None
+    leads_done = 0
+    journal = WorkflowJournal(source_name)
+    if not settings.resume_runs:
+        journal.discard()
+    
+    if metrics is None:
+        metrics = PipelineMetrics()
+    
+    with ChunkedLeadWriter(output_filename) as writer:
+        for chunk in metrics.timed_iter(iter_lead_chunks(source, source_name, settings.chunk_size), 'ingest'):
+            if journal.exists() and journal.replay(chunk):
+                logger.add_log('system', f"Restored checkpointed results for chunk {writer.chunks + 1}", 'info')
+            supervisor = SupervisorAgent(chunk)
+            identities = build_identity_index(chunk, settings, logger, supervisor)
+            process_leads(chunk, supervisor, logger, settings, journal=journal, identities=identities,
+                          metrics=metrics)
+            with metrics.timer('save'):
+                writer.write(chunk)
+            
+            campaign = supervisor if campaign is None else campaign.merge(supervisor)
+            leads_done += len(chunk)
+            if on_chunk:
+                on_chunk(campaign, leads_done, writer.chunks)
+    
+    if campaign is None:
+        return None, output_filename
+    journal.discard()
+    logger.add_log('system', f"Updated leads file saved as '{output_filename}'", 'success')
+    return campaign, output_filename
+
+
+def shard_leads(leads_df, shards, key='domain'):
+    """Split leads_df into shards by a stable hash of each lead's email domain (or whole email).
+
+    Sharding by domain keeps every lead of a company in the same shard, so
+    per-domain checks are still resolved once.
+    """
+    emails = leads_df['Email'].astype('string').str.strip().str.lower().fillna('')
+    keys = emails.str.rpartition('@')[2] if key == 'domain' else emails
+    buckets = pd.util.hash_pandas_object(keys, index=False).to_numpy() % shards
+    return [leads_df[buckets == shard] for shard in range(shards)]
+
+
+def shard_journal(source_name, shard, shards):
+    return WorkflowJournal(f"{Path(source_name).name}.shard{shard + 1}-of-{shards}")
+
+
+def _run_shard(shard_df, source_name, shard, shards, settings):
+    """Process one shard in a worker process; returns the processed shard, its supervisor state and metrics"""
+    settings = make_settings(**settings)
+    logger = ActivityLogger()
+    metrics = PipelineMetrics()
+    journal = shard_journal(source_name, shard, shards)
+    resume_from_journal(journal, shard_df, logger, settings.resume_runs)
+    supervisor = SupervisorAgent(shard_df)
+    identities = build_identity_index(shard_df, settings, logger, supervisor)
+    process_leads(shard_df, supervisor, logger, settings, journal=journal, identities=identities,
+                  metrics=metrics)
+    supervisor.df = None
+    return shard_df, supervisor, metrics
+
+
+def run_sharded_workflow(leads_df, source_name, settings, logger, shards, key='domain', on_shard=None,
+                         metrics=None):
+    """Run the workflow over shards of leads_df in a process pool and merge the results.
+
+    Each shard gets its own supervisor, agent pools and checkpoint journal;
+    the processed shards are reassembled in the original row order and
+    saved as one working file. on_shard(campaign, shards_done, shards) is
+    called as shards finish and each shard's metrics are merged into
+    metrics. Returns (campaign, output_filename).
+    """
+    to_typed_leads(leads_df)
+    logger.add_log('system', f"Processing file: {source_name} in {shards} shards", 'info')
+    shard_settings = {setting: getattr(settings, setting) for setting in DEFAULT_SETTINGS}
+    
+    processed = []
+    campaign = None
+    with ProcessPoolExecutor(max_workers=shards) as pool:
+        futures = {
+            pool.submit(_run_shard, shard_df, source_name, shard, shards, shard_settings): shard
+            for shard, shard_df in enumerate(shard_leads(leads_df, shards, key))
+            if len(shard_df)
+        }
+        for future in as_completed(futures):
+            shard_df, supervisor, shard_metrics = future.result()
+            processed.append(shard_df)
+            if metrics is not None:
+                metrics.merge(shard_metrics)
+            campaign = supervisor if campaign is None else campaign.merge(supervisor)
+            logger.add_log('supervisor', 
+                          f"Shard {futures[future] + 1}/{shards} finished: {len(shard_df)} leads", 
+                          'success')
+            if on_shard:
+                on_shard(campaign, len(processed), len(futures))
+    
+    if campaign is None:
+        return None, None
+    campaign.df = pd.concat(processed).reindex(leads_df.index)
+    output_filename = processed_filename(source_name, WORKING_FORMAT)
+    save_leads(campaign.df, output_filename)
+    for shard in range(shards):
+        shard_journal(source_name, shard, shards).discard()
+    logger.add_log('system', f"Updated leads file saved as '{output_filename}'", 'success')
+    return campaign, output_filename
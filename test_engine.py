@@ -0,0 +1,111 @@
+import time
+
+import pandas as pd
+
+import engine
+from backends import SendBackend
+from engine import (
+    EMAIL_PATTERN, ActivityLogger, IdentityIndex, OutreachDispatcher, SupervisorAgent, WorkflowJournal, make_settings,
+    VerificationCache, prevalidate_emails, run_workflow, to_typed_leads
+)
+
+
+def leads(**columns):
+    df = pd.DataFrame(columns)
+    df['Lead Name'] = [f"Lead {i}" for i in range(len(df))]
+    df['Company'] = 'Acme'
+    df['Priority'] = 'Medium'
+    df['Lead Score'] = 50
+    return to_typed_leads(df)
+
+
+def test_prevalidate_keeps_non_ascii_addresses():
+    df = leads(Email=['josé@acme.com', 'x@bücher.de', "o'brien@acme.com", 'no-at-sign', 'a@b'])
+    rejected = prevalidate_emails(df)
+    assert sorted(rejected) == [3, 4]
+    assert df['Email Verified'].isna().tolist() == [True, True, True, False, False]
+    assert all(EMAIL_PATTERN.fullmatch(email) for email in df['Email'][:3])
+
+
+def test_identity_index_links_non_ascii_addresses():
+    df = leads(Email=['josé@acme.com', ' JOSÉ@acme.com', 'x@bücher.de'])
+    assert IdentityIndex(df).canonical.tolist() == [0, 0, 2]
+
+
+def test_journal_replays_each_chunk_from_one_scan(tmp_path):
+    journal = WorkflowJournal('leads.csv', tmp_path)
+    journal.record_verifications([(0, True), (1, False), (2, True)],
+                                 {0: 'a@acme.com', 1: 'b@acme.com', 2: 'c@acme.com'})
+    journal.record_responses([(0, 'Interested')], {0: 'a@acme.com'}, pd.Timestamp('2026-01-02 03:04:05'))
+    df = leads(Email=['a@acme.com', 'b@acme.com', 'changed@acme.com'])
+    
+    assert journal.replay(df.iloc[:0].copy()) == 0
+    first, second = df.iloc[:2].copy(), df.iloc[2:].copy()
+    assert journal.replay(first) == 2
+    assert journal.replay(second) == 0
+    assert first['Email Verified'].tolist() == [True, False]
+    assert first['Response Status'].tolist()[0] == 'Interested'
+    assert first['Last Contact'].iloc[0] == pd.Timestamp('2026-01-02 03:04:05')
+    assert second['Email Verified'].isna().all()
+
+
+def test_duplicate_of_a_finished_lead_gets_its_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = leads(Email=['a@acme.com', 'A@Acme.com ', 'b@acme.com'],
+               **{'Email Verified': ['Y', '', 'N'], 'Response Status': ['Interested', '', ''],
+                  'Last Contact': ['2026-01-02 03:04:05', '', '']})
+    settings = make_settings(verify_backend='fake://', send_backend='fake://', use_verification_cache=False)
+    supervisor = SupervisorAgent(df)
+    
+    supervisor, output = run_workflow(df, 'leads.csv', settings, ActivityLogger(), supervisor=supervisor)
+    assert output is not None
+    assert df['Email Verified'].tolist() == [True, True, False]
+    assert df['Response Status'].tolist()[:2] == ['Interested', 'Interested']
+    assert df['Last Contact'].iloc[1] == pd.Timestamp('2026-01-02 03:04:05')
+    assert not supervisor.pending_verification and not supervisor.pending_outreach
+
+
+class BouncingSender(SendBackend):
+    def send_many(self, leads, progress=None):
+        return ['Bounced' if lead['Email'].startswith('b') else 'Interested' for lead in leads]
+
+
+def test_unknown_response_labels_are_kept_and_counted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(engine, 'get_send_backend', lambda *args, **kwargs: BouncingSender())
+    df = leads(Email=['a@acme.com', 'b@acme.com'], **{'Email Verified': ['Y', 'Y']})
+    settings = make_settings(send_rate_limit=None, use_verification_cache=False)
+    
+    supervisor, _ = run_workflow(df, 'leads.csv', settings, ActivityLogger())
+    assert df['Response Status'].tolist() == ['Interested', 'Bounced']
+    breakdown = supervisor.breakdown('Company').loc['Acme']
+    assert (breakdown['Interested'], breakdown['Other Response']) == (1, 1)
+    
+    resumed = leads(Email=['a@acme.com', 'b@acme.com'])
+    journal = WorkflowJournal('leads.csv', tmp_path)
+    journal.record_responses([(1, 'Bounced')], {1: 'b@acme.com'}, pd.Timestamp('2026-01-02'))
+    assert journal.replay(resumed) == 1
+    assert resumed['Response Status'].tolist()[1] == 'Bounced'
+
+
+def test_bulk_send_timeout_scales_with_group_size():
+    delivered = []
+    
+    def send(lead):
+        time.sleep(0.01)
+        delivered.append(lead)
+        return 'No Response'
+    
+    dispatcher = OutreachDispatcher(send, max_workers=2, rate_limit=None, timeout=0.05, bulk_size=20)
+    results = [result for batch in dispatcher.run((i, i) for i in range(40)) for result in batch]
+    assert sorted(delivered) == list(range(40))
+    assert all(response == 'No Response' for _, response in results)
+
+
+def test_verification_cache_is_kept_per_backend(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    fake = VerificationCache(path, backend='fake://')
+    fake.put_many([('A@acme.com', True)])
+    real = VerificationCache(path, backend='https://verifier.example/verify')
+    assert real.get('a@acme.com') is None
+    assert VerificationCache(path, backend='fake://').get('a@acme.com') is True